@@ -1,6 +1,10 @@
 import collections
+import csv
+import itertools
 import pathlib
 import json
+import msgspec
+import sys
 
 ctf = {
     "services": {},
@@ -12,6 +16,15 @@ ctf = {
     },
 }
 
+
+class TeamRound(msgspec.Struct):
+    """Per-round data for one team (encodes like the equivalent dict)"""
+
+    service_states: dict
+    flags_stored: dict
+    flags_captured: list
+
+
 codemap = {
     "101": "OK",
     "104": "DOWN",
@@ -26,10 +39,11 @@ flagstore_ids = {}  # servicename: id
 team_map = {}  # id: name
 svc_map = {}  # id: name
 
-with (data_dir / "services.csv").open() as file:
-    rows = list(file.read().strip().split("\n"))
-    for row in rows[1:]:
-        id, name, shortname = row.split(",")
+with (data_dir / "services.csv").open(newline="") as file:
+    rows = csv.reader(file)
+    next(rows)  # skip header
+    for id, name, shortname in rows:
+        name = sys.intern(name)
         fsid = len(flagstore_ids)
         flagstore_ids[name] = fsid
         svc_map[id] = name
@@ -37,83 +51,94 @@ with (data_dir / "services.csv").open() as file:
             "flagstores": [fsid],
         }
 
-with (data_dir / "teams.csv").open() as file:
-    rows = list(file.read().strip().split("\n"))
-    for row in rows[1:]:
-        id, name, shortname = row.split(",")
+with (data_dir / "teams.csv").open(newline="") as file:
+    rows = csv.reader(file)
+    next(rows)  # skip header
+    for id, name, shortname in rows:
+        name = sys.intern(name)
         ctf["teams"].append(name)
         team_map[id] = name
 
-
-def create_trd(team, round_id):
-    while round_id >= len(ctf["rounds"]):
-        ctf["rounds"].append({})
-    if team not in ctf["rounds"][round_id]:
-        ctf["rounds"][round_id][team] = {
-            "service_states": {},
-            "flags_stored": {ss: {} for ss in svc_map.values()},
-            "flags_captured": [],
-        }
-
-
-with (data_dir / "flags.csv").open() as file:
-    rows = list(file.read().strip().split("\n"))
-    for row in rows[1:]:
-        id, flag, round, status, teamId, serviceId = row.split(",")
-        team = team_map[teamId]
-        create_trd(team, int(round) - 1)
-        assert status in ("READY", "FAILED"), row
-        if status == "READY":
-            ctf["rounds"][int(round) - 1][team]["flags_stored"][svc_map[serviceId]][
-                flagstore_ids[svc_map[serviceId]]
-            ] = int(id)
-
 checks = collections.defaultdict(dict)
 max_round = 0
-with (data_dir / "scoreboard_checks.csv").open() as file:
-    rows = list(file.read().strip().split("\n"))
-    for row in rows[1:]:
-        round, teamId, serviceShortname, action, exitCode, stdout = row.split(",")
-        create_trd(team_map[teamId], int(round) - 1)
+with (data_dir / "scoreboard_checks.csv").open(newline="") as file:
+    rows = csv.reader(file)
+    next(rows)  # skip header
+    for row in rows:
+        round, teamId, serviceShortname, action, exitCode, stdout = row
         assert action in ("CHECK_SLA", "GET_FLAG", "PUT_FLAG"), row
         assert (exitCode == "101") == (stdout == "OK"), row
-        checks[(int(round) - 1, team_map[teamId], serviceShortname)][action] = codemap[exitCode]
+        checks[(int(round) - 1, team_map[teamId], sys.intern(serviceShortname))][action] = codemap[exitCode]
         max_round = max(max_round, int(round) - 1)
 
-for rr in range(max_round + 1):
-    for tt in ctf["teams"]:
-        create_trd(tt, rr)
-        for ss in ctf["services"]:
-            if rr == max_round:
-                put = "OK"
-            else:
-                put = checks[(rr, tt, ss)]["PUT_FLAG"]
-            sla = checks[(rr, tt, ss)]["CHECK_SLA"]
-            # getflag is not called if previous 5 PUT_FLAG failed, per rules
-            get = checks[(rr, tt, ss)].get("GET_FLAG")
-            if all(v in ("ERROR", None) for v in (put, sla, get)):
-                state = "ERROR"
-            elif all(v in ("OK", "ERROR", None) for v in (put, sla, get)):
-                state = "OK"
-            elif put == "OK" and sla == "OK" and get == "DOWN":
-                state = "RECOVERING"
-            else:
-                state = "MUMBLE"
-            ctf["rounds"][rr][tt]["service_states"][ss] = state
-
-with (data_dir / "stolen_flags.csv").open() as file:
-    rows = list(file.read().strip().split("\n"))
-    for row in rows[1:]:
-        id, attackerId, flagId, round, timestamp = row.split(",")
-        ctf["rounds"][int(round) - 1][team_map[attackerId]]["flags_captured"].append(
+# Flag rows may reach past the last checked round, so they count towards the round total
+last_round = max_round
+stored_flags = []  # (round, team, service, flag id)
+with (data_dir / "flags.csv").open(newline="") as file:
+    rows = csv.reader(file)
+    next(rows)  # skip header
+    for row in rows:
+        id, flag, round, status, teamId, serviceId = row
+        assert status in ("READY", "FAILED"), row
+        last_round = max(last_round, int(round) - 1)
+        if status == "READY":
+            stored_flags.append((int(round) - 1, team_map[teamId], svc_map[serviceId], int(id)))
+
+ctf["rounds"] = [
+    {
+        tt: TeamRound(
+            service_states={},
+            flags_stored={ss: {} for ss in svc_map.values()},
+            flags_captured=[],
+        )
+        for tt in ctf["teams"]
+    }
+    for _ in range(last_round + 1)
+]
+
+for rr, tt, ss, flag_id in stored_flags:
+    ctf["rounds"][rr][tt].flags_stored[ss][flagstore_ids[ss]] = flag_id
+
+
+def service_state(put, sla, get):
+    if all(v in ("ERROR", None) for v in (put, sla, get)):
+        return "ERROR"
+    elif all(v in ("OK", "ERROR", None) for v in (put, sla, get)):
+        return "OK"
+    elif put == "OK" and sla == "OK" and get == "DOWN":
+        return "RECOVERING"
+    else:
+        return "MUMBLE"
+
+
+# (put, sla, get) -> state
+state_map = {
+    results: service_state(*results)
+    for results in itertools.product((*codemap.values(), None), repeat=3)
+}
+
+assert len(checks) == (max_round + 1) * len(ctf["teams"]) * len(ctf["services"])
+for (rr, tt, ss), actions in checks.items():
+    if rr == max_round:
+        put = "OK"
+    else:
+        put = actions["PUT_FLAG"]
+    sla = actions["CHECK_SLA"]
+    # getflag is not called if previous 5 PUT_FLAG failed, per rules
+    get = actions.get("GET_FLAG")
+    ctf["rounds"][rr][tt].service_states[ss] = state_map[(put, sla, get)]
+
+with (data_dir / "stolen_flags.csv").open(newline="") as file:
+    rows = csv.reader(file)
+    next(rows)  # skip header
+    for id, attackerId, flagId, round, timestamp in rows:
+        ctf["rounds"][int(round) - 1][team_map[attackerId]].flags_captured.append(
             int(flagId)
         )
 
 scores = collections.defaultdict(lambda: {})
-import csv
-with (data_dir / "scoreboard_teams.csv").open() as file:
-    rows = list(file.read().strip().split("\n"))
-    rows = csv.reader(rows)
+with (data_dir / "scoreboard_teams.csv").open(newline="") as file:
+    rows = csv.reader(file)
     next(rows) # skip header
     for row in rows:
         round, id, adscore, _, _, info, _ = row
@@ -121,8 +146,8 @@ with (data_dir / "scoreboard_teams.csv").open() as file:
 assert set(range(len(scores))) == set(scores)
 scores = [v for _,v in sorted(scores.items())]
 
-with output_data.open("w") as out:
-    json.dump(ctf, out)
+with output_data.open("wb") as out:
+    out.write(msgspec.json.encode(ctf))
 
-with output_scores.open("w") as out:
-    json.dump(scores, out)
+with output_scores.open("wb") as out:
+    out.write(msgspec.json.encode(scores))
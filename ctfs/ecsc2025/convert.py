@@ -3,10 +3,11 @@ Convert gameserver data into a format scoring-playground can understand.
 """
 
 import argparse
-import json
 import csv
-from types import SimpleNamespace
-from collections import defaultdict
+import functools
+import msgspec
+import sys
+from collections import defaultdict, namedtuple
 
 parser = argparse.ArgumentParser()
 parser.add_argument("-o", "--output", required=True)
@@ -14,18 +15,37 @@ args = parser.parse_args()
 
 flag_rounds_valid = 5
 
+# Checker results carry the per-flag status as {"<tick>_<payload>": "<status>"}
+flag_status_decoder = msgspec.json.Decoder(dict[str, str])
 
-def readrows(path: str):
-    with open(path) as file:
+
+@functools.cache
+def parse_flag_key(key: str) -> tuple[int, int]:
+    # The same keys show up in every checker result within the validity window
+    related_tick, payload = key.split("_", 1)
+    return int(related_tick), int(payload)
+
+
+def readrows(path: str, int_columns: tuple[str, ...] = ()):
+    with open(path, newline="") as file:
         reader = csv.reader(file)
         header = next(reader)
         rows = sorted(reader, key=lambda row: int(row[0]))
-        for row_list in rows:
-            row_dict = dict(zip(header, row_list))
-            for key, value in row_dict.items():
-                if value.isdigit():
-                    row_dict[key] = int(value)  # type: ignore
-            yield SimpleNamespace(**row_dict)
+    Row = namedtuple("Row", header, rename=True)
+    int_indices = [header.index(column) for column in int_columns]
+    for row in rows:
+        for index in int_indices:
+            row[index] = int(row[index])  # type: ignore
+        yield Row._make(row)
+
+
+class TeamRound(msgspec.Struct):
+    """Per-round data for one team (encodes like the equivalent dict)"""
+
+    service_states: dict
+    flags_stored: dict
+    flags_captured: list
+
 
 states = {
     "SUCCESS": "OK",
@@ -43,55 +63,66 @@ flagstorecnt = 0
 flagstoremap = {}
 services = {}
 service_names = {}
-for row in readrows("upstream/services.csv"):
-    services[row.name] = {
+for row in readrows("upstream/services.csv", ("id", "num_payloads")):
+    service_name = sys.intern(row.name)
+    services[service_name] = {
         "flagstores": tuple(flagstorecnt + i for i in range(row.num_payloads)),
     }
     for i in range(row.num_payloads):
         flagstoremap[row.id, i] = flagstorecnt + i
     flagstorecnt += row.num_payloads
-    service_names[row.id] = row.name
+    service_names[row.id] = service_name
 data["services"] = services
 
 teams = []
 team_names = {}
-for row in readrows("upstream/teams.csv"):
-    teams.append(row.name)
-    team_names[row.id] = row.name
+for row in readrows("upstream/teams.csv", ("id",)):
+    team_name = sys.intern(row.name)
+    teams.append(team_name)
+    team_names[row.id] = team_name
 data["teams"] = teams
 
-from collections import defaultdict
-
-rounds = defaultdict(
-    lambda: defaultdict(
-        lambda: {
-            "service_states": {},
-            "flags_stored": defaultdict(lambda: {}),
-            "flags_captured": [],
-        }
-    )
-)
+rounds = {}
+
+
+def team_round(tick: int, team_name: str) -> TeamRound:
+    per_team = rounds.get(tick)
+    if per_team is None:
+        per_team = rounds[tick] = {}
+    team_data = per_team.get(team_name)
+    if team_data is None:
+        team_data = per_team[team_name] = TeamRound(
+            service_states={}, flags_stored={}, flags_captured=[]
+        )
+    return team_data
+
+
 flagmap = {}
 flagstates = defaultdict(lambda: {})
 flagcnt = 0
-for row in readrows("upstream/checker_results.csv"):
+for row in readrows(
+    "upstream/checker_results.csv", ("tick", "team_id", "service_id")
+):
     team_name = team_names[row.team_id]
     service_name = service_names[row.service_id]
-    for flagstore_id in services[service_names[row.service_id]]["flagstores"]:
-        rounds[row.tick][team_name]["flags_stored"][service_name][flagstore_id] = (
-            flagcnt
-        )
+    team_data = team_round(row.tick, team_name)
+    for flagstore_id in services[service_name]["flagstores"]:
+        team_data.flags_stored.setdefault(service_name, {})[flagstore_id] = flagcnt
         flagmap[(row.tick, row.team_id, row.service_id, flagstore_id)] = flagcnt
         flagcnt += 1
 
-    not_ok_ticks = set()
-    for key, flag_status in json.loads(row.data).items():
-        related_tick, flagstore_id_ = key.split("_", 1)
-        related_tick, flagstore_id_ = int(related_tick), int(flagstore_id_)
+    # Track whether flags are missing only from the oldest tick in the window
+    oldest_tick = row.tick - flag_rounds_valid
+    oldest_missing = newer_missing = False
+    for key, flag_status in flag_status_decoder.decode(row.data).items():
+        related_tick, flagstore_id_ = parse_flag_key(key)
         flag_status = "OK" if flag_status == "OK" else "MISSING"
-        if flag_status != "OK" and related_tick >= row.tick - flag_rounds_valid:
-            not_ok_ticks.add(related_tick)
-        if related_tick <= row.tick - flag_rounds_valid:
+        if flag_status != "OK":
+            if related_tick == oldest_tick:
+                oldest_missing = True
+            elif related_tick > oldest_tick:
+                newer_missing = True
+        if related_tick <= oldest_tick:
             continue
         flagstore_id = flagstoremap[row.service_id, flagstore_id_]
         flag_key = (related_tick, row.team_id, row.service_id, flagstore_id)
@@ -101,18 +132,21 @@ for row in readrows("upstream/checker_results.csv"):
             assert flag_status != "OK"
 
     status = states[row.status]
-    if status == "RECOVERING" and not_ok_ticks == {row.tick - flag_rounds_valid}:
+    if status == "RECOVERING" and oldest_missing and not newer_missing:
         status = "OK" # from hotfix for validity period
-    rounds[row.tick][team_name]["service_states"][service_name] = status
+    team_data.service_states[service_name] = status
 
-for row in readrows("upstream/submitted_flags.csv"):
+for row in readrows(
+    "upstream/submitted_flags.csv",
+    ("service_id", "payload", "tick_issued", "team_id", "submitted_by", "tick_submitted"),
+):
     flagstore_id = flagstoremap[row.service_id, row.payload]
     flag_key = (row.tick_issued, row.team_id, row.service_id, flagstore_id)
     flagid = flagmap[flag_key]
     team_name = team_names[row.submitted_by]
     if row.tick_issued <= row.tick_submitted - flag_rounds_valid:
         continue
-    rounds[row.tick_submitted][team_name]["flags_captured"].append(flagid)
+    team_round(row.tick_submitted, team_name).flags_captured.append(flagid)
 
 roundlist = []
 for _, row in sorted(rounds.items()):
@@ -128,5 +162,5 @@ data["config"] = {
     "flag_validity": flag_rounds_valid,
 }
 
-with open(args.output, "w") as file:
-    json.dump(data, file)
+with open(args.output, "wb") as file:
+    file.write(msgspec.json.encode(data))
@@ -1,6 +1,7 @@
 import argparse
 from collections import defaultdict
-import json
+import msgspec
+import sys
 
 import psycopg2
 
@@ -17,6 +18,23 @@ connection = psycopg2.connect(
 
 cursor = connection.cursor()
 
+
+def stream(query: str):
+    """Iterate over the query results with a server-side cursor instead of fetching everything at once"""
+    with connection.cursor(name="stream") as stream_cursor:
+        stream_cursor.itersize = 50_000
+        stream_cursor.execute(query)
+        yield from stream_cursor
+
+
+class TeamRound(msgspec.Struct):
+    """Per-round data for one team (encodes like the equivalent dict)"""
+
+    service_states: dict
+    flags_stored: dict
+    flags_captured: list
+
+
 service_status = {
     0: "OK",
     1: "OFFLINE", # Error in the network connection, e.g. a timeout or connection abort
@@ -33,28 +51,26 @@ valid_ticks = (cursor.fetchone() or [])[0]
 service_names = {}
 cursor.execute("SELECT id,name FROM scoring_service")
 for service_id,name in cursor.fetchall():
-    service_names[service_id] = name
+    service_names[service_id] = sys.intern(name)
 
 team_names = {}
 cursor.execute("SELECT id,username FROM auth_user")
 for team_id,name in cursor.fetchall():
-    team_names[team_id] = name
+    team_names[team_id] = sys.intern(name)
 
 round_status = defaultdict(lambda: defaultdict(lambda: {}))
-cursor.execute("SELECT tick,status,service_id,team_id FROM scoring_statuscheck")
-for tick,status,service_id,team_id in cursor.fetchall():
+for tick,status,service_id,team_id in stream("SELECT tick,status,service_id,team_id FROM scoring_statuscheck"):
     assert team_id != 1
     round_status[tick][team_id][service_id] = service_status[status]
 
-flags_stored = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: 0))))
-cursor.execute("SELECT id,tick,protecting_team_id,service_id FROM scoring_flag")
-for flag_id,tick,victim_id,service_id in cursor.fetchall():
+# There is exactly one flagstore per service (named after the service ID)
+flags_stored = {}
+for flag_id,tick,victim_id,service_id in stream("SELECT id,tick,protecting_team_id,service_id FROM scoring_flag"):
     assert victim_id != 1
-    flags_stored[tick][victim_id][service_id][str(service_id)] = flag_id
+    flags_stored[tick,victim_id,service_id] = {str(service_id): flag_id}
 
 flags_captured = defaultdict(lambda: defaultdict(lambda: []))
-cursor.execute("SELECT tick,capturing_team_id,flag_id FROM scoring_capture")
-for tick,attacker_id,flag_id in cursor.fetchall():
+for tick,attacker_id,flag_id in stream("SELECT tick,capturing_team_id,flag_id FROM scoring_capture"):
     assert attacker_id != 1
     flags_captured[tick][attacker_id].append(flag_id)
 
@@ -67,14 +83,14 @@ rounds = []
 for round_id in range(0, max_tick):
     round_info = {}
     for team_id,team_name in team_names.items():
-        team_info = {
-            "service_states": {},
-            "flags_stored": {},
-            "flags_captured": flags_captured[round_id][team_id]
-        }
+        team_info = TeamRound(
+            service_states={},
+            flags_stored={},
+            flags_captured=flags_captured[round_id][team_id],
+        )
         for service_id,service_name in service_names.items():
-            team_info["service_states"][service_name] = round_status[round_id][team_id].get(service_id, "OFFLINE")
-            team_info["flags_stored"][service_name] = flags_stored[round_id][team_id][service_id]
+            team_info.service_states[service_name] = round_status[round_id][team_id].get(service_id, "OFFLINE")
+            team_info.flags_stored[service_name] = flags_stored.get((round_id,team_id,service_id), {})
         round_info[team_name] = team_info
     rounds.append(round_info)
 
@@ -91,5 +107,5 @@ ctf = {
     }
 }
 
-with open(args.output, "w") as file:
-    json.dump(ctf, file, indent=4)
+with open(args.output, "wb") as file:
+    file.write(msgspec.json.encode(ctf))
@@ -1,6 +1,6 @@
-import json
+import msgspec
+import sys
 from collections import defaultdict
-from typing import Any
 
 import psycopg2
 
@@ -13,12 +13,31 @@ connection = psycopg2.connect(
 
 last_round_id = 211
 
+
+class TeamRound(msgspec.Struct):
+    """Per-round data for one team (encodes like the equivalent dict)"""
+
+    service_states: dict
+    flags_stored: dict
+    flags_captured: list
+
+
 cursor = connection.cursor()
 
+
+def stream(query: str):
+    """Iterate over the query results with a server-side cursor instead of fetching everything at once"""
+    with connection.cursor(name="stream") as stream_cursor:
+        stream_cursor.itersize = 50_000
+        stream_cursor.execute(query)
+        yield from stream_cursor
+
+
 teams = []
 team_names = {}
 cursor.execute("SELECT id,name FROM teams ORDER by id")
 for team_id, team_name in cursor.fetchall():
+    team_name = sys.intern(team_name)
     teams.append(team_name)
     team_names[team_id] = team_name
 
@@ -28,6 +47,7 @@ flagstore_count = 0
 cursor.execute("SELECT id,name,num_payloads,flags_per_round FROM services ORDER BY id")
 service_names = {}
 for svc_id, svc_name, flag_variants, flags_per_round in cursor.fetchall():
+    svc_name = sys.intern(svc_name)
     service_names[svc_id] = svc_name
     services[svc_name] = {"flagstores": []}
     for flagstore_index in range(flag_variants):
@@ -37,23 +57,34 @@ for svc_id, svc_name, flag_variants, flags_per_round in cursor.fetchall():
 sns = list(services.keys())
 
 checker_results = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: None)))
-cursor.execute("SELECT round,team_id,service_id,status FROM checker_results")
-for round_id, team_id, service_id, checker_result in cursor.fetchall():
+for round_id, team_id, service_id, checker_result in stream(
+    "SELECT round,team_id,service_id,status FROM checker_results"
+):
     checker_results[round_id][team_names[team_id]][service_names[service_id]] = checker_result
 
-captured: Any = defaultdict(
-    lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: set())))
-)
-cursor.execute(
+# (round, attacker, service, flagstore) -> {(issued round, victim)}
+captured: dict[tuple[int, str, str, int], set[tuple[int, str]]] = {}
+for row in stream(
     "SELECT round_submitted,round_issued,submitted_by,"
     "team_id,service_id,payload FROM submitted_flags"
-)
-for row in cursor.fetchall():
+):
     round_id, issued_round_id, attacker_id = row[:3]
     victim_id, service_id, flagstore_id_ = row[3:]
     capture_info = (issued_round_id, team_names[victim_id])
     flagstore_id = flagstore_lut[service_id, flagstore_id_]
-    captured[round_id][team_names[attacker_id]][service_names[service_id]][flagstore_id].add(capture_info)
+    capture_key = (round_id, team_names[attacker_id], service_names[service_id], flagstore_id)
+    captured.setdefault(capture_key, set()).add(capture_info)
+
+checker_states = {
+    None: 'OFFLINE',
+    'SUCCESS': 'OK',
+    'REVOKED': 'ERROR', # XXX handle that
+    'CRASHED': 'ERROR',
+    'FLAGMISSING': 'RECOVERING',
+    'MUMBLE': 'MUMBLE',
+    'OFFLINE': 'OFFLINE',
+    'TIMEOUT': 'MUMBLE', # XXX?
+}
 
 rounds = []
 next_flag_id = 0
@@ -69,6 +100,7 @@ pending_flags = set()
 cursor.execute("SELECT DISTINCT round FROM checker_results ORDER BY round")
 rounds_ = [r for (r,) in cursor.fetchall() if r > 0]
 rounds = []
+flagstores_by_service = {service: data["flagstores"] for service, data in services.items()}
 for round_index, round_id in enumerate(rounds_):
     assert round_index + 1 == round_id
     if round_id > last_round_id:
@@ -83,44 +115,36 @@ for round_index, round_id in enumerate(rounds_):
     for team in teams:
         service_states = {}
         flags_stored = {}
-        for service in services:
-            team_results = checker_results[round_id][team]
-            vpn_state_ = any(result is not None for result in (team_results or {}).values())
-            vpn_state = "online" if vpn_state_ else "offline"
+        team_results = checker_results[round_id][team]
+        vpn_state_ = any(result is not None for result in (team_results or {}).values())
+        vpn_state = "online" if vpn_state_ else "offline"
+        for service, flagstores in flagstores_by_service.items():
             result = team_results[service]
-            match result:
-                case None: result = 'OFFLINE'
-                case 'SUCCESS': result = 'OK'
-                case 'REVOKED': result = 'ERROR'; revoked = True # XXX handle that
-                case 'CRASHED': result = 'ERROR'
-                case 'FLAGMISSING': result = 'RECOVERING'
-                case 'MUMBLE' | 'OFFLINE': pass
-                case 'TIMEOUT': result = 'MUMBLE' # XXX?
-                case _: raise KeyError(result)
+            result = checker_states[result]
             service_states[service] = result
             if vpn_state == 'offline':
                 assert result == 'OFFLINE'
             flags_stored[service] = {}
-            for flagstore_id in services[service]["flagstores"]:
+            for flagstore_id in flagstores:
                 if result in ('ERROR', 'OFFLINE'):
                     # only stored successfully if proven to be stored
                     pending_flags.add((round_id, team, service, flagstore_id))
                 else:
                     flags_stored[service][flagstore_id] = get_flag(round_id, team, service, flagstore_id)
-        rnd[team] = {
-            'service_states': service_states,
-            'flags_stored': flags_stored,
-            'flags_captured': [],
-        }
+        rnd[team] = TeamRound(
+            service_states=service_states,
+            flags_stored=flags_stored,
+            flags_captured=[],
+        )
     rounds.append(rnd)
     for team in teams:
-        for service, service_data in services.items():
-            for flagstore_id in service_data["flagstores"]:
-                for src_round, victim in captured[round_id][team][service][flagstore_id]:
+        for service, flagstores in flagstores_by_service.items():
+            for flagstore_id in flagstores:
+                for src_round, victim in captured.get((round_id, team, service, flagstore_id), ()):
                     flag_id = get_flag(src_round, victim, service, flagstore_id)
                     if (src_round, victim, service, flagstore_id) in pending_flags:
-                        rounds[src_round-1][victim]['flags_stored'][service][flagstore_id] = flag_id
-                    rounds[-1][team]['flags_captured'].append(flag_id)
+                        rounds[src_round-1][victim].flags_stored[service][flagstore_id] = flag_id
+                    rounds[-1][team].flags_captured.append(flag_id)
 
 
 ctf = {
@@ -135,8 +159,8 @@ ctf = {
         ]
     }
 }
-with open("data.json", 'w') as writer:
-    json.dump(ctf, writer, indent=4)
+with open("data.json", 'wb') as writer:
+    writer.write(msgspec.json.encode(ctf))
 
 cursor.execute(
     "SELECT round,team_id,service_id,sla_points,off_points,def_points FROM team_points"
@@ -157,5 +181,5 @@ assert 0 not in scores
 scores[0] = {team: {"combined": 0} for team in teams}
 assert set(range(len(scores))) == set(scores)
 scores = [v for _,v in sorted(scores.items())]
-with open("scores.json", "w") as file:
-    json.dump(scores, file, indent=4)
+with open("scores.json", "wb") as file:
+    file.write(msgspec.json.encode(scores))
@@ -3,37 +3,58 @@ from matplotlib.lines import Line2D
 
 import os
 import json
+import re
 
 import matplotlib.pyplot as plt
+import numpy as np
 from collections import defaultdict
 
+round_pattern = re.compile(r"-(\d+)\.")
+
+
+def round_of(name):
+    match = round_pattern.search(name)
+    return int(match[1]) if match else 0
+
+
 attacking = [defaultdict(lambda: False) for i in range(2)]
 d = [[], []]
-for f in sorted(
-    os.listdir("out"),
-    key=lambda v: 0 if "-" not in v else int(v.split("-")[1].split(".")[0]),
-):
+teams = team_set = None
+for f in sorted(os.listdir("out"), key=round_of):
     if f.startswith("jeopardy-") or f.startswith("saarctf-"):
-        x = int(f.split("-")[1].split(".")[0])
-        c = int(f.split("-")[0] == "jeopardy")
-        data = json.load(open(f"out/{f}"))
-        teams = sorted(list(data.keys()))
+        x = round_of(f)
+        c = int(f.startswith("jeopardy-"))
+        with open(f"out/{f}") as file:
+            data = json.load(file)
+        if teams is None:
+            teams = sorted(data.keys())
+            team_set = set(teams)
+        assert data.keys() == team_set, f"Team mismatch in {f}"
         for i, team in enumerate(teams):
             attacking[c][i] = attacking[c][i] or data[team]["categories"]["ATK"] > 0
         d[c].append([(x, data[team]["combined"]) for team in teams])
 
-data1, data2 = [list(zip(*dd)) for dd in d]
-max1 = max(max(y for _, y in line) for line in data1)
-max2 = max(max(y for _, y in line) for line in data2)
+# Shape: (rounds, teams, 2), with (x, combined) in the last axis
+data1, data2 = [np.array(dd, dtype=float) for dd in d]
+max1 = data1[..., 1].max()
+max2 = data2[..., 1].max()
+data2[..., 1] *= max1 / max2
 
 plt.figure(figsize=(10, 6))
-for i, line in enumerate(data1):
-    x, y = zip(*line)
-    plt.plot(x, y, color="lightblue" if not attacking[0][i] else "blue", alpha=0.5)
-for i, line in enumerate(data2):
-    line = [(x, y / max2 * max1) for x, y in line]
-    x, y = zip(*line)
-    plt.plot(x, y, color="orange" if not attacking[1][i] else "red", alpha=0.5)
+for i in range(data1.shape[1]):
+    plt.plot(
+        data1[:, i, 0],
+        data1[:, i, 1],
+        color="lightblue" if not attacking[0][i] else "blue",
+        alpha=0.5,
+    )
+for i in range(data2.shape[1]):
+    plt.plot(
+        data2[:, i, 0],
+        data2[:, i, 1],
+        color="orange" if not attacking[1][i] else "red",
+        alpha=0.5,
+    )
 plt.xlabel("Rounds")
 plt.ylabel("Points")
 plt.title("Scoring Formula Comparison")
@@ -1,7 +1,9 @@
 import argparse
 import dataclasses
 import enum
+import functools
 import msgspec
+import operator
 import sys
 import tabulate
 import types
@@ -13,6 +15,62 @@ from .scoring import formulas
 from .model import Score
 
 
+@functools.cache
+def resolve_base_type(
+    type_hint: typing.Any,
+) -> tuple[type, bool, str | None]:  # (type, allowed to be none?, problem)
+    if type_hint is dataclasses.MISSING:
+        return str, False, "Missing type hint"
+    elif typing.get_origin(type_hint) in (types.UnionType, typing.Union):
+        union_types = set(typing.get_args(type_hint))
+        may_be_none = type(None) in union_types or None in union_types
+        union_types -= {type(None), None}
+        if len(union_types) > 1:
+            return str, may_be_none, f"Cannot handle multi-type union {union_types}"
+        if not union_types:
+            raise TypeError("Union type contains only None")
+        base_type, base_may_be_none, problem = resolve_base_type(union_types.pop())
+        return base_type, base_may_be_none or may_be_none, problem
+    elif isinstance(type_hint, type):
+        return type_hint, False, None
+    elif isinstance(type_hint, typing.NewType):
+        return resolve_base_type(type_hint.__supertype__)
+    else:
+        return str, False, f"Cannot handle type hint {type_hint}"
+
+
+def base_type_of(
+    type_hint: typing.Any, *, location: str | None = None
+) -> tuple[type, bool]:  # (type, allowed to be none?)
+    base_type, may_be_none, problem = resolve_base_type(type_hint)
+    if problem is not None:
+        warnings.warn(
+            problem
+            + (f" for {location}" if location is not None else "")
+            + ", falling back to str"
+        )
+    return base_type, may_be_none
+
+
+@functools.cache
+def option_fields(ty: type) -> tuple[dataclasses.Field, ...]:
+    """The configurable (public) fields of a data source or scoring formula"""
+    if not dataclasses.is_dataclass(ty):
+        return ()
+    return tuple(
+        field for field in dataclasses.fields(ty) if not field.name.startswith("_")
+    )
+
+
+type_hints = functools.cache(typing.get_type_hints)
+
+
+@functools.cache
+def enum_converter(enum_type: type[enum.Enum]) -> typing.Callable[[str], typing.Any]:
+    # Unknown keys are passed through so that argparse reports them as invalid choices
+    return lambda key: enum_type[key] if key in enum_type.__members__ else key
+
+
 def parse_args(args: list[str]):
     data_sources = sorted(source.__name__ for source in sources)
     scoring_formulas = sorted(formula.__name__ for formula in formulas)
@@ -62,59 +120,17 @@ def parse_args(args: list[str]):
         add_help=False, allow_abbrev=False, usage=argparse.SUPPRESS
     )
 
-    def base_type_of(
-        type_hint: typing.Any, *, location: str | None = None
-    ) -> tuple[type, bool]:  # (type, allowed to be none?)
-        if type_hint is dataclasses.MISSING:
-            warnings.warn(
-                "Missing type hint"
-                + (f" for {location}" if location is not None else "")
-                + ", falling back to str"
-            )
-            return str, False
-        elif typing.get_origin(type_hint) in (types.UnionType, typing.Union):
-            union_types = set(typing.get_args(type_hint))
-            may_be_none = type(None) in union_types or None in union_types
-            union_types -= {type(None), None}
-            if len(union_types) > 1:
-                warnings.warn(
-                    f"Cannot handle multi-type union {union_types}"
-                    + (f" for {location}" if location is not None else "")
-                    + ", falling back to str"
-                )
-                return str, may_be_none
-            if not union_types:
-                raise TypeError("Union type contains only None")
-            base_type, base_may_be_none = base_type_of(
-                union_types.pop(), location=location
-            )
-            return base_type, base_may_be_none or may_be_none
-        elif isinstance(type_hint, type):
-            return type_hint, False
-        elif isinstance(type_hint, typing.NewType):
-            return base_type_of(type_hint.__supertype__, location=location)
-        else:
-            warnings.warn(
-                f"Cannot handle type hint {type_hint}"
-                + (f" for {location}" if location is not None else "")
-                + ", falling back to str"
-            )
-            return str, False
-
     def build_options_parser(root: argparse.ArgumentParser, title: str, ty: type):
-        if not dataclasses.is_dataclass(ty):
-            return
-
-        fields = [
-            field for field in dataclasses.fields(ty) if not field.name.startswith("_")
-        ]
+        fields = option_fields(ty)
         if not fields:
             return
 
-        hints = typing.get_type_hints(ty)
         subparser = root.add_argument_group(title)
         for field in fields:
-            expected_type = hints.get(field.name, dataclasses.MISSING)
+            expected_type = field.type
+            if isinstance(expected_type, str):
+                # Only stringified annotations need to be evaluated
+                expected_type = type_hints(ty).get(field.name, dataclasses.MISSING)
             argument_type, may_be_none = base_type_of(
                 expected_type, location=f"{ty.__name__}.{field.name}"
             )
@@ -126,11 +142,7 @@ def parse_args(args: list[str]):
             choices = None
             if issubclass(argument_type, enum.Enum):
                 choices = argument_type.__members__.values()
-                argument_type = (
-                    lambda key, enum_type=argument_type: enum_type[key]
-                    if key in enum_type.__members__
-                    else key
-                )
+                argument_type = enum_converter(argument_type)
 
             required = False
             help_text = None
@@ -172,7 +184,7 @@ def parse_args(args: list[str]):
         return ty(
             **{
                 field.name: getattr(options, field.name)
-                for field in dataclasses.fields(ty)
+                for field in option_fields(ty)
                 if field.name in options
             }
         )
@@ -224,19 +236,18 @@ def __main__() -> None:
             sys.stdout.buffer.write(msgspec.json.encode(scoreboard))
         case "table":
             keys = list(Score.get_categories(scoreboard))
-            data = [
+            rows = [
                 [team, score.combined, *(score.categories[key] for key in keys)]
-                for team, score in sorted(
-                    scoreboard.items(), key=lambda item: item[1].combined, reverse=True
-                )
+                for team, score in scoreboard.items()
             ]
+            rows.sort(key=operator.itemgetter(1), reverse=True)
             if base.scale_to:
                 keys.append("(scaled)")
-                max_score = data[0][1]
-                for row in data:
+                max_score = rows[0][1]
+                for row in rows:
                     row.append(row[1] / max_score * base.scale_to)
             print(
                 tabulate.tabulate(
-                    data, headers=("Team", "Score", *keys), tablefmt="simple_grid"
+                    rows, headers=("Team", "Score", *keys), tablefmt="simple_grid"
                 )
             )
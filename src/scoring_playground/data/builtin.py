@@ -1,8 +1,14 @@
 import functools
+import hashlib
+import importlib
 import importlib.abc
 import importlib.resources
 import msgspec
+import os
+import pathlib
+import tempfile
 import typing
+import warnings
 
 from ..model import CTF, DataSource
 
@@ -11,22 +17,36 @@ class FileDataSource(DataSource):
     """Base class for data sources that load data from files shipped with this package"""
 
     path: typing.ClassVar[importlib.abc.Traversable | None]
+    # Raw data, loaded on first use (per class, never inherited)
+    _bytes: typing.ClassVar[bytes]
+    _str: typing.ClassVar[tuple[str | None, str]]
 
     @classmethod
-    @functools.cache
     def read_bytes(cls: type[typing.Self]) -> bytes:
         """Load the raw data that backs this data source as bytes"""
         if cls.path is None:
             raise AttributeError("read_bytes")
-        return cls.path.read_bytes()
+        data = cls.__dict__.get("_bytes")
+        if data is None:
+            data = cls._bytes = cls.path.read_bytes()
+        return data
 
     @classmethod
-    @functools.cache
     def read_str(cls: type[typing.Self], encoding: str | None = None) -> str:
         """Load the raw data that backs this data source as a string, optionally with the specified encoding"""
         if cls.path is None:
             raise AttributeError("read_str")
-        return cls.path.read_text(encoding)
+        cached = cls.__dict__.get("_str")
+        if cached is None or cached[0] != encoding:
+            cached = cls._str = (encoding, cls.path.read_text(encoding))
+        return cached[1]
+
+    @classmethod
+    def release(cls: type[typing.Self]) -> None:
+        """Drop the raw data (e.g. once it has been decoded)"""
+        for attribute in ("_bytes", "_str"):
+            if attribute in cls.__dict__:
+                delattr(cls, attribute)
 
     def __init_subclass__(cls: type[typing.Self], file_name: str | None = None) -> None:
         super().__init_subclass__()
@@ -40,6 +60,53 @@ class FileDataSource(DataSource):
             )
 
 
+def cache_dir() -> pathlib.Path | None:
+    """Directory for decoded CTF data (respects $XDG_CACHE_HOME), or None unless $SCORING_PLAYGROUND_CACHE=1"""
+    if os.environ.get("SCORING_PLAYGROUND_CACHE", "0") == "0":
+        return None
+    base = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(base) / "scoring_playground"
+
+
+@functools.cache
+def model_digest() -> str:
+    """Hash of the code that post-processes decoded CTF data (defaults, flag state estimation)"""
+    package = importlib.resources.files("scoring_playground")
+    digest = hashlib.blake2b(digest_size=8)
+    for name in ("model.py", "util.py"):
+        digest.update(package.joinpath(name).read_bytes())
+    return digest.hexdigest()
+
+
+class CachedWarning(msgspec.Struct, array_like=True):
+    """A warning emitted while processing a CTF, replayed whenever the cached CTF is loaded"""
+
+    category: str  # "module:qualname"
+    message: str
+
+    @classmethod
+    def capture(cls: type[typing.Self], warning: warnings.WarningMessage) -> typing.Self:
+        category = warning.category
+        return cls(f"{category.__module__}:{category.__qualname__}", str(warning.message))
+
+    def replay(self) -> None:
+        module, _, qualname = self.category.partition(":")
+        try:
+            category = functools.reduce(getattr, qualname.split("."), importlib.import_module(module))
+        except (ImportError, AttributeError):
+            category = UserWarning
+        if not (isinstance(category, type) and issubclass(category, Warning)):
+            category = UserWarning
+        warnings.warn(self.message, category)
+
+
+class CachedCTF(msgspec.Struct):
+    """A fully processed CTF, plus the warnings that processing it emitted"""
+
+    ctf: CTF
+    warnings: tuple[CachedWarning, ...] = ()
+
+
 class JSONDataSource(FileDataSource):
     @classmethod
     @functools.partial(
@@ -49,4 +116,49 @@ class JSONDataSource(FileDataSource):
     def load(cls: type[typing.Self]) -> CTF:
         # By default, just try to load the JSON data with msgspec.
         # If you have other needs, override this.
-        return msgspec.json.decode(cls.read_bytes(), type=CTF)
+        raw = cls.read_bytes()
+        # load() is cached, so the raw data is not needed anymore
+        cls.release()
+
+        directory = cache_dir()
+        if directory is None:
+            return msgspec.json.decode(raw, type=CTF)
+
+        # Decoding the processed CTF is a lot cheaper than decoding the JSON and estimating missing data
+        # again, so keep it around. The key covers both the raw data and the code that processes it.
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        cached = directory / f"{cls.__name__}-{digest}-{model_digest()}.mp"
+        try:
+            entry = msgspec.msgpack.decode(cached.read_bytes(), type=CachedCTF)
+        except (OSError, msgspec.DecodeError):
+            pass
+        else:
+            for warning in entry.warnings:
+                warning.replay()
+            return entry.ctf
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            ctf = msgspec.json.decode(raw, type=CTF)
+        captured = tuple(CachedWarning.capture(warning) for warning in caught)
+        for warning in captured:
+            warning.replay()
+
+        temporary = None
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=directory, prefix=cached.name, delete=False
+            ) as temporary:
+                temporary.write(msgspec.msgpack.encode(CachedCTF(ctf, captured)))
+            os.replace(temporary.name, cached)
+            # Entries for older versions of the data or the code are never read again
+            for stale in directory.glob(f"{cls.__name__}-*.mp"):
+                if stale != cached:
+                    stale.unlink(missing_ok=True)
+        except OSError:
+            # The cache is optional, but do not leave partial entries behind
+            if temporary is not None:
+                pathlib.Path(temporary.name).unlink(missing_ok=True)
+        return ctf
+        return ctf
@@ -1,13 +1,14 @@
 import abc
+import bisect
 import collections
 import dataclasses
 import enum
-import frozendict
 import msgspec
+import sys
 import typing
 import warnings
 
-from .util import defaults, immutable_cache
+from .util import defaults, force_setattr, immutable_cache
 
 FlagId = typing.NewType("FlagId", int)
 FlagStoreId = typing.NewType("FlagStoreId", int)
@@ -33,8 +34,8 @@ class FlagState(enum.Enum):
     MISSING = "MISSING"
 
 
-@dataclasses.dataclass
-class Flag:
+# Only holds scalars, so it never needs to be tracked by the garbage collector
+class Flag(msgspec.Struct, gc=False):
     """Information about a flag"""
 
     flag_id: FlagId
@@ -50,56 +51,86 @@ class FlagCaptures:
 
     count: int = 0
     by: typing.MutableMapping[RoundId, typing.MutableSequence[TeamName]] = (
-        dataclasses.field(default_factory=lambda: collections.defaultdict(list))
+        dataclasses.field(default_factory=dict)
+    )
+    # One entry per capture, sorted by round, so that the counts below are a binary search
+    _rounds: list[RoundId] = dataclasses.field(
+        default_factory=list, repr=False, compare=False
     )
 
+    def record(self, round_id: RoundId, attacker: TeamName) -> None:
+        self.count += 1
+        attackers = self.by.get(round_id)
+        if attackers is None:
+            attackers = self.by[round_id] = []
+        attackers.append(attacker)
+        if not self._rounds or self._rounds[-1] <= round_id:
+            self._rounds.append(round_id)  # Captures are usually recorded in round order
+        else:
+            bisect.insort(self._rounds, round_id)
+
     def count_before_round(self, target_round_id: RoundId) -> int:
-        return sum(
-            len(attackers)
-            for round_id, attackers in self.by.items()
-            if round_id < target_round_id
-        )
+        return bisect.bisect_left(self._rounds, target_round_id)
 
     def count_in_round(self, target_round_id: RoundId) -> int:
         return len(self.by.get(target_round_id, []))
 
     def count_including_round(self, target_round_id: RoundId) -> int:
-        return sum(
-            len(attackers)
-            for round_id, attackers in self.by.items()
-            if round_id <= target_round_id
+        return bisect.bisect_right(self._rounds, target_round_id)
+
+    def before_round(self, target_round_id: RoundId) -> "FlagCaptures":
+        """The captures in the rounds before target_round_id"""
+        count = bisect.bisect_left(self._rounds, target_round_id)
+        return FlagCaptures(
+            count,
+            {
+                round_id: list(attackers)
+                for round_id, attackers in self.by.items()
+                if round_id < target_round_id
+            },
+            self._rounds[:count],
         )
 
 
-@dataclasses.dataclass(frozen=True)
-class TeamRoundData:
+class TeamRoundData(msgspec.Struct, frozen=True, dict=True):
     """Information about one round for one team"""
 
-    service_states: typing.Mapping[ServiceName, ServiceState]
-    flags_stored: typing.Mapping[ServiceName, typing.Mapping[FlagStoreId, FlagId]]
+    # The mappings are decoded as plain dicts and must not be modified
+    service_states: dict[ServiceName, ServiceState]
+    flags_stored: dict[ServiceName, dict[FlagStoreId, FlagId]]
     flags_captured: tuple[FlagId, ...]
 
     def __post_init__(self):
-        # Freeze typing.Mapping (deserialized as dict, but it does not need to be mutable)
-        object.__setattr__(
-            self, "service_states", frozendict.frozendict(self.service_states)
+        # The decoder creates separate strings for each occurrence of a name, intern them
+        force_setattr(
+            self,
+            "service_states",
+            {
+                sys.intern(service): state
+                for service, state in self.service_states.items()
+            },
         )
-        object.__setattr__(
+        force_setattr(
             self,
             "flags_stored",
-            frozendict.frozendict(
-                {
-                    service: frozendict.frozendict(by_flagstore)
-                    for service, by_flagstore in self.flags_stored.items()
-                }
-            ),
+            {
+                sys.intern(service): per_flagstore
+                for service, per_flagstore in self.flags_stored.items()
+            },
         )
 
     def iterate_stored_flags(self) -> typing.Iterator[FlagId]:
-        return (
-            flag_id
-            for flagstore in self.flags_stored.values()
-            for flag_id in flagstore.values()
+        return (flag_id for _, _, flag_id in self.all_stored_flags_flat)
+
+    @property
+    @immutable_cache
+    def all_stored_flags_flat(
+        self,
+    ) -> tuple[tuple[ServiceName, FlagStoreId, FlagId], ...]:
+        return tuple(
+            (service, flagstore, flag_id)
+            for service, per_flagstore in self.flags_stored.items()
+            for flagstore, flag_id in per_flagstore.items()
         )
 
     @property
@@ -107,60 +138,81 @@ class TeamRoundData:
     def all_stored_flags(self) -> dict[tuple[ServiceName, FlagStoreId], FlagId]:
         return {
             (service, flagstore): flag_id
-            for service, per_flagstore in self.flags_stored.items()
-            for flagstore, flag_id in per_flagstore.items()
+            for service, flagstore, flag_id in self.all_stored_flags_flat
         }
 
 
-@defaults(
-    # "Normal" CTFs put one flag into each flagstore in each round
-    flag_rate=lambda self: len(typing.cast(Service, self).flagstores)
-)
-@dataclasses.dataclass(slots=True, frozen=True)
-class Service:
+def _is_interned(names: typing.Iterable[str]) -> bool:
+    return all(sys.intern(name) is name for name in names)
+
+
+class Service(msgspec.Struct, frozen=True):
     """Metadata about a service"""
 
     flagstores: tuple[FlagStoreId, ...]
     flag_rate: float | msgspec.UnsetType = msgspec.UNSET
 
+    def __post_init__(self):
+        _service_defaults(self)
+
 
-@defaults(
-    # "Normal" CTFs retrieve flags for the amount of rounds they are valid for
-    flag_retention=lambda self: typing.cast(Config, self).flag_validity
+_service_defaults = defaults(
+    # "Normal" CTFs put one flag into each flagstore in each round
+    flag_rate=lambda self: len(typing.cast(Service, self).flagstores)
 )
-@dataclasses.dataclass(frozen=True)
-class Config:
+
+
+class Config(msgspec.Struct, frozen=True):
     """CTF configuration"""
 
     flag_validity: int
     messages: tuple[str, ...] = ()
     flag_retention: int | msgspec.UnsetType = msgspec.UNSET
 
+    def __post_init__(self):
+        _config_defaults(self)
 
-@defaults(
-    # Try to estimate flag states from the service states --- most CTF state is recorded in a lossy fashion
-    flag_states=lambda self: self._estimate_flag_states()
+
+_config_defaults = defaults(
+    # "Normal" CTFs retrieve flags for the amount of rounds they are valid for
+    flag_retention=lambda self: typing.cast(Config, self).flag_validity
 )
-@dataclasses.dataclass(frozen=True)
-class CTF:
+
+
+class CTF(msgspec.Struct, frozen=True, dict=True):
     """A CTF"""
 
-    services: typing.Mapping[ServiceName, Service]
-    teams: typing.Sequence[TeamName]
-    rounds: typing.Sequence[typing.Mapping[TeamName, TeamRoundData]]
+    # The mappings are decoded as plain dicts and must not be modified
+    services: dict[ServiceName, Service]
+    teams: tuple[TeamName, ...]
+    rounds: tuple[dict[TeamName, TeamRoundData], ...]
     config: Config
-    flag_states: (
-        typing.Sequence[typing.Mapping[FlagId, FlagState]] | msgspec.UnsetType
-    ) = msgspec.UNSET
+    flag_states: tuple[dict[FlagId, FlagState], ...] | msgspec.UnsetType = (
+        msgspec.UNSET
+    )
 
     def __post_init__(self):
-        # Freeze typing.Mapping (deserialized as dict, but it does not need to be mutable)
-        object.__setattr__(self, "services", frozendict.frozendict(self.services))
-        object.__setattr__(
-            self,
-            "rounds",
-            tuple(frozendict.frozendict(round_data) for round_data in self.rounds),
-        )
+        # Intern team and service names, so that the same name is the same object in every round.
+        # Newer msgspec versions also run this from msgspec.structs.replace (i.e., in slice()), where
+        # everything is interned already, so only rebuild what still needs it.
+        if not _is_interned(self.teams):
+            force_setattr(self, "teams", tuple(map(sys.intern, self.teams)))
+        if not _is_interned(self.services):
+            force_setattr(
+                self,
+                "services",
+                {sys.intern(name): service for name, service in self.services.items()},
+            )
+        if not all(map(_is_interned, self.rounds)):
+            force_setattr(
+                self,
+                "rounds",
+                tuple(
+                    {sys.intern(team): team_data for team, team_data in round_data.items()}
+                    for round_data in self.rounds
+                ),
+            )
+        _ctf_defaults(self)
 
     def enumerate(
         self,
@@ -180,39 +232,66 @@ class CTF:
             for flagstore in service.flagstores
         ]
 
+    def _build_flag_indexes(
+        self,
+    ) -> tuple[
+        dict[FlagId, Flag],
+        typing.MutableMapping[FlagId, FlagCaptures],
+        list[list[Flag]],
+        list[list[FlagId]],
+    ]:
+        """Builds the flag and capture indexes in a single pass over the rounds
+
+        Also returns, for each round, the flags stored and the (distinct) flags captured in that round,
+        so that slice() can build the indexes of a slice without looking at the rounds outside of it.
+        """
+        flags: dict[FlagId, Flag] = {}
+        captures: typing.MutableMapping[FlagId, FlagCaptures] = collections.defaultdict(
+            FlagCaptures
+        )
+        flags_by_round: list[list[Flag]] = []
+        captured_by_round: list[list[FlagId]] = []
+        for round_id, round_data in self.enumerate():
+            stored: list[Flag] = []
+            captured: list[FlagId] = []
+            for team, team_data in round_data.items():
+                for service, per_flagstore in team_data.flags_stored.items():
+                    for flagstore, flag_id in per_flagstore.items():
+                        flag = flags[flag_id] = Flag(
+                            flag_id, round_id, team, service, flagstore
+                        )
+                        stored.append(flag)
+                for flag_id in team_data.flags_captured:
+                    capture = captures[flag_id]
+                    if round_id not in capture.by:
+                        captured.append(flag_id)
+                    capture.record(round_id, team)
+            flags_by_round.append(stored)
+            captured_by_round.append(captured)
+        return flags, captures, flags_by_round, captured_by_round
+
+    # Cached under the name of the undecorated builder, so that slice() can peek at and seed it
+    _flag_indexes = property(immutable_cache(_build_flag_indexes))
+
     @property
-    @immutable_cache
     def flags(self) -> dict[FlagId, Flag]:
         """Collect all flags stored by the checker"""
-        return {
-            flag_id: Flag(flag_id, round_id, team, service, flagstore)
-            for round_id, round_data in self.enumerate()
-            for team, team_data in round_data.items()
-            for service, per_flagstore in team_data.flags_stored.items()
-            for flagstore, flag_id in per_flagstore.items()
-        }
+        return self._flag_indexes[0]
 
     @property
-    @immutable_cache
     def flag_captures(self) -> typing.MutableMapping[FlagId, FlagCaptures]:
         """Collects how often each flag was captured, and by whom"""
-        captures: typing.MutableMapping[FlagId, FlagCaptures] = collections.defaultdict(
-            FlagCaptures
-        )
-        for round_id, round_data in self.enumerate():
-            for team, team_data in round_data.items():
-                for flag_id in team_data.flags_captured:
-                    captures[flag_id].count += 1
-                    captures[flag_id].by[round_id].append(team)
-        return captures
+        return self._flag_indexes[1]
 
     def slice(
         self, from_round: int | None = None, to_round: int | None = None
     ) -> typing.Self:
         """Slices a subrange of the CTF (think rounds[from_round:to_round])"""
-        from_round = from_round if from_round is not None else 0
-        to_round = to_round if to_round is not None else len(self.rounds)
-        sliced = dataclasses.replace(
+        from_round, to_round, _ = slice(from_round, to_round).indices(len(self.rounds))
+        to_round = max(from_round, to_round)
+        if from_round == 0 and to_round == len(self.rounds):
+            return self  # Immutable, so there is nothing to copy
+        sliced = msgspec.structs.replace(
             self,
             rounds=self.rounds[from_round:to_round],
             flag_states=self.flag_states[from_round:to_round]
@@ -220,6 +299,42 @@ class CTF:
             else msgspec.UNSET,
         )
         immutable_cache.reset(sliced)
+
+        # Prefixes (e.g. the scoreboard after each round) can share the flag indexes of this CTF if they exist.
+        # The rounds in the slice are visited in the same order as walking them would. Anything else needs to
+        # renumber every flag and capture, which is no cheaper than walking the rounds of the slice again.
+        if from_round:
+            return sliced
+        build_indexes = type(self)._build_flag_indexes
+        try:
+            _, captures, flags_by_round, captured_by_round = immutable_cache.peek(
+                self, build_indexes
+            )
+        except KeyError:
+            return sliced
+        sliced_flags_by_round = flags_by_round[:to_round]
+        sliced_flags: dict[FlagId, Flag] = {}
+        for stored in sliced_flags_by_round:
+            for flag in stored:
+                sliced_flags[flag.flag_id] = flag
+        sliced_captured_by_round = captured_by_round[:to_round]
+        sliced_captures: typing.MutableMapping[FlagId, FlagCaptures] = (
+            collections.defaultdict(FlagCaptures)
+        )
+        for captured in sliced_captured_by_round:
+            for flag_id in captured:
+                if flag_id not in sliced_captures:
+                    capture = captures[flag_id]
+                    sliced_captures[flag_id] = (
+                        capture
+                        if capture.count_before_round(RoundId(to_round)) == capture.count
+                        else capture.before_round(RoundId(to_round))
+                    )
+        immutable_cache.store(
+            sliced,
+            build_indexes,
+            (sliced_flags, sliced_captures, sliced_flags_by_round, sliced_captured_by_round),
+        )
         return sliced
 
     def _estimate_flag_states(
@@ -231,35 +346,27 @@ class CTF:
         per_round = []
         assert (
             self.config.flag_retention is not msgspec.UNSET
-        )  # Mostly to make typing happy, this is an @defaults entry
+        )  # Mostly to make typing happy, this is filled in by _config_defaults
+        retention = self.config.flag_retention
         for round_id, round_data in self.enumerate():
             round_result = {}
+            window = range(int(round_id) - retention + 1, round_id + 1)
             for team, team_data in round_data.items():
+                # Flags placed within the retention period, per service (oldest placement first).
+                # Results are written straight from these instead of building set unions.
+                placed = [self.rounds[placement][team].flags_stored for placement in window]
                 for service, state in team_data.service_states.items():
-                    checked_flags = set.union(
-                        *[
-                            set(
-                                self.rounds[placement][team]
-                                .flags_stored[service]
-                                .values()
-                            )
-                            for placement in range(
-                                int(round_id) - self.config.flag_retention + 1,
-                                round_id + 1,
-                            )
-                        ]
-                    )
+                    checked_flags = [by_placement[service] for by_placement in placed]
                     match state:
-                        case ServiceState.OK:
-                            # All flags placed within the retention period are present (we know this for sure)
-                            for flag_id in checked_flags:
-                                round_result[flag_id] = FlagState.OK
-                        case ServiceState.ERROR:
-                            # This is a checker error. We don't actually know what flags are present. Just
+                        case ServiceState.OK | ServiceState.ERROR:
+                            # OK: All flags placed within the retention period are present (we know this for sure)
+                            # ERROR: This is a checker error. We don't actually know what flags are present. Just
                             # assume that they're all there for fairness (this should not actually happen
                             # but nothing is perfect).
-                            for flag_id in checked_flags:
-                                round_result[flag_id] = FlagState.OK
+                            for per_flagstore in checked_flags:
+                                round_result.update(
+                                    dict.fromkeys(per_flagstore.values(), FlagState.OK)
+                                )
                         case ServiceState.RECOVERING:
                             # Some flags placed within the retention period are present, but not all of them.
                             # The last one was available for sure, though, since otherwise we would be MUMBLE.
@@ -268,10 +375,10 @@ class CTF:
                             # Alternatively, a "maximum" availability estimate can be achieved by dropping only
                             # one round of flags (not the most recent one) from the list. A "minimum" can be
                             # achieved by retaining _only_ the most recent set of flags.
-                            present = self.config.flag_retention - 1
+                            present = retention - 1
                             for future_round in range(
                                 int(round_id) + 1,
-                                int(round_id) + self.config.flag_retention,
+                                int(round_id) + retention,
                             ):
                                 if future_round >= len(self.rounds):
                                     # End of the CTF, I guess we will never know.
@@ -289,41 +396,40 @@ class CTF:
                                     # This round was not yet OK, so we can't have had _all_ the rounds present.
                                     # This means we 'expect' there to be another flag missing in this round.
                                     present -= 1
-                            present = min(self.config.flag_retention - 1, present)
+                            present = min(retention - 1, present)
                             present = max(present, 1)
-                            # Arbitrarily pick the last 'present' rounds.
-                            present_flags = set.union(
-                                *[
-                                    set(
-                                        self.rounds[placement][team]
-                                        .flags_stored[service]
-                                        .values()
-                                    )
-                                    for placement in range(
-                                        int(round_id) - present + 1, round_id + 1
-                                    )
-                                ]
-                            )
-                            for flag_id in checked_flags:
-                                round_result[flag_id] = (
+                            # Arbitrarily pick the last 'present' rounds. Older placements are written first,
+                            # so a flag that was (also) placed in one of those rounds ends up OK.
+                            for placement, per_flagstore in enumerate(checked_flags):
+                                flag_state = (
                                     FlagState.OK
-                                    if flag_id in present_flags
+                                    if placement >= len(checked_flags) - present
                                     else FlagState.MISSING
                                 )
-                        case ServiceState.OFFLINE:
-                            # Service was unreachable, so no flags are checkable.
-                            for flag_id in checked_flags:
-                                round_result[flag_id] = FlagState.MISSING
-                        case ServiceState.MUMBLE:
-                            # We don't know which flags are still there, but generally, we can treat this as if
-                            # no flags could be fetched (typically, there won't be any SLA/DEF points for this
+                                round_result.update(
+                                    dict.fromkeys(per_flagstore.values(), flag_state)
+                                )
+                        case ServiceState.OFFLINE | ServiceState.MUMBLE:
+                            # OFFLINE: Service was unreachable, so no flags are checkable.
+                            # MUMBLE: We don't know which flags are still there, but generally, we can treat this as
+                            # if no flags could be fetched (typically, there won't be any SLA/DEF points for this
                             # anyways, if individual flag state is considered at all).
-                            for flag_id in checked_flags:
-                                round_result[flag_id] = FlagState.MISSING
+                            for per_flagstore in checked_flags:
+                                round_result.update(
+                                    dict.fromkeys(
+                                        per_flagstore.values(), FlagState.MISSING
+                                    )
+                                )
             per_round.append(round_result)
         return tuple(per_round)
 
 
+_ctf_defaults = defaults(
+    # Try to estimate flag states from the service states --- most CTF state is recorded in a lossy fashion
+    flag_states=lambda self: typing.cast(CTF, self)._estimate_flag_states()
+)
+
+
 @dataclasses.dataclass(slots=True, frozen=True, order=True)
 class Score:
     """A single score value, optionally with per-category subscores"""
@@ -339,21 +445,34 @@ class Score:
             object.__setattr__(self, "categories", kwargs)
 
     def __add__(self, other: typing.Self) -> typing.Self:
-        return type(self)(
-            combined=self.combined + other.combined,
-            categories={
+        if self.categories.keys() == other.categories.keys():
+            # Common case (e.g. Score.default everywhere): no need to build the key union
+            categories = {
+                cat: value + other.categories[cat]
+                for cat, value in self.categories.items()
+            }
+        else:
+            categories = {
                 cat: self.categories[cat] + other.categories[cat]
                 for cat in self.categories.keys() | other.categories.keys()
-            },
+            }
+        return type(self)(
+            combined=self.combined + other.combined, categories=categories
         )
 
     def __sub__(self, other: typing.Self) -> typing.Self:
-        return type(self)(
-            combined=self.combined - other.combined,
-            categories={
+        if self.categories.keys() == other.categories.keys():
+            categories = {
+                cat: value - other.categories[cat]
+                for cat, value in self.categories.items()
+            }
+        else:
+            categories = {
                 cat: self.categories[cat] - other.categories[cat]
                 for cat in self.categories.keys() | other.categories.keys()
-            },
+            }
+        return type(self)(
+            combined=self.combined - other.combined, categories=categories
         )
 
     @staticmethod
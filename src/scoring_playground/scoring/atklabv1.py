@@ -28,54 +28,72 @@ class ATKLABv1(ScoringFormula):
         if ctf.config.flag_retention is UNSET:
             raise KeyError(f"No flag retention period defined in CTF data")
 
-        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+        flags = ctf.flags
+        retention = ctf.config.flag_retention
+        team_count = len(ctf.teams)
+
+        # The value of a flag only depends on how often it was captured in total
+        attack_points = {
+            flag_id: (1 + 1 / captures.count) / 2
+            for flag_id, captures in ctf.flag_captures.items()
+        }
+        defense_points = {
+            flag_id: (1 + captures.count / team_count) / 2
+            for flag_id, captures in ctf.flag_captures.items()
+        }
+
+        # Accumulate plain floats, and only build the Score objects at the end
+        attack: dict[TeamName, float] = {}
+        sla: dict[TeamName, float] = {}
+        # Consecutive RECOVERING rounds per service, ending in the previous round and the round before that
+        recovering: dict[tuple[TeamName, ServiceName], tuple[int, int]] = {}
         for round_id, round_data in ctf.enumerate():
+            max_flags = min(round_id + 1, retention)
             for team, team_data in round_data.items():
-                score = Score.default()
+                team_attack = attack.get(team, 0.0)
+                team_sla = sla.get(team, 0.0)
 
                 # SLA points
                 for service, state in team_data.service_states.items():
-                    max_flags = min(round_id + 1, ctf.config.flag_retention)
+                    last, before_last = recovering.get((team, service), (0, 0))
+                    recovering[team, service] = (
+                        last + 1 if state == ServiceState.RECOVERING else 0,
+                        last,
+                    )
                     if state == ServiceState.OK:
                         present = max_flags
                     elif state == ServiceState.RECOVERING:
-                        present = 1
                         # XXX: We assume here that flags which were present in
                         #      previous rounds are still present and returned.
-                        for previous_round in reversed(
-                            range(
-                                max(0, round_id - ctf.config.flag_retention),
-                                round_id - 1,
-                            )
-                        ):
-                            if (
-                                ctf.rounds[previous_round][team].service_states[service]
-                                != ServiceState.RECOVERING
-                            ):
-                                break
-                            present += 1
+                        #      This counts the RECOVERING rounds directly before
+                        #      round_id - 1 (within the retention period).
+                        present = 1 + min(
+                            before_last,
+                            max(0, round_id - 1 - max(0, round_id - retention)),
+                        )
                         present = min(present, max_flags)
                     else:
-                        present = 0
-                    if state in (ServiceState.OK, ServiceState.RECOVERING):
-                        score += Score.default(sla=present / max_flags)
+                        continue  # No SLA points
+                    team_sla += present / max_flags
 
                 # Attack points
                 for flag_id in team_data.flags_captured:
-                    flag = ctf.flags[flag_id]
-                    if flag.owner == team:
+                    if flags[flag_id].owner == team:
                         continue
-                    capture_count = ctf.flag_captures[flag_id].count
-                    score += Score.default(attack=(1 + 1 / capture_count) / 2)
+                    team_attack += attack_points[flag_id]
 
-                # Defense points
-                for flagstore_data in team_data.flags_stored.values():
-                    for flag_id in flagstore_data.values():
-                        if count := ctf.flag_captures[flag_id].count:
-                            score -= Score.default(
-                                defense=(1 + count / len(ctf.teams)) / 2
-                            )
+                attack[team] = team_attack
+                sla[team] = team_sla
 
-                scoreboard[team] += score
+        # Defense points: each stored flag that was captured costs its owner (flags are indexed in round order)
+        defense: dict[TeamName, float] = {}
+        for flag_id, flag in flags.items():
+            if (points := defense_points.get(flag_id)) is not None:
+                defense[flag.owner] = defense.get(flag.owner, 0.0) - points
 
+        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+        for team in attack:
+            scoreboard[team] = Score.default(
+                attack=attack[team], defense=defense.get(team, 0.0), sla=sla[team]
+            )
         return scoreboard
@@ -1,6 +1,8 @@
 import dataclasses
 import enum
 import collections
+import functools
+import sys
 import typing
 
 from msgspec import UNSET
@@ -130,8 +132,9 @@ class ATKLABv2(ScoringFormula):
         # Forcibly clamp the score to 0 - capturing flags should never be worth negative points.
         # Note that the solve count is a float rather than an int because all formulas allow
         # interpolation and it could be useful in some places.
+        # Call the implementation directly, the Wrapper only exists to make the enum work
         return max(
-            self.jeopardy.value(
+            self.jeopardy.value.implementation(
                 solves, len(ctf.teams), self.alpha, self.beta, self.min, self.base
             ),
             0,
@@ -149,145 +152,230 @@ class ATKLABv2(ScoringFormula):
         if ctf.flag_states is UNSET:
             raise KeyError(f"No flag state information defined in CTF data")
 
-        # Pre-compute victims for each service/flagstore/attacker,
-        # attributed back to the round in which the stolen flag was deployed
-        attacked_teams: typing.MutableMapping[
-            tuple[RoundId, ServiceName, FlagStoreId],
-            typing.MutableMapping[TeamName, set[TeamName]],
-        ] = collections.defaultdict(lambda: collections.defaultdict(set))
-        for round_id, round_data in ctf.enumerate():
-            for team, team_data in round_data.items():
-                for flag_id in team_data.flags_captured:
-                    flag = ctf.flags[flag_id]
-                    if flag.owner == team or self.nop_team in (flag.owner, team):
-                        continue
-                    attacked_teams[(flag.round_id, flag.service, flag.flagstore)][
-                        team
-                    ].add(ctf.flags[flag_id].owner)
-
-        # Pre-compute active teams for each tick.
+        flags = ctf.flags
+        rounds = ctf.rounds
+        # Only retrievable flags count, so keep just their ids for each round
+        flags_ok = [
+            {flag_id for flag_id, state in flag_states.items() if state == FlagState.OK}
+            for flag_states in ctf.flag_states
+        ]
+        flag_validity = ctf.config.flag_validity
+        nop_team = self.nop_team and TeamName(sys.intern(self.nop_team))
+
+        # Jeopardy values only depend on the solve count, everything else is fixed during an evaluation
+        jeopardy = functools.cache(lambda solves: self._jeopardy(solves, ctf))
+
+        # The attack value of a flag only depends on how often it was captured in total
+        attack_points = {
+            flag_id: jeopardy(captures.count)
+            for flag_id, captures in ctf.flag_captures.items()
+        }
+
+        # Pre-compute (in one pass over the CTF):
+        #  - victims for each service/flagstore/attacker,
+        #    attributed back to the round in which the stolen flag was deployed
+        #  - successful attackers for each service/flagstore in that round
+        #  - attackers of each victim for each service/flagstore in that round
+        #  - active teams for each tick
+        #  - which services of each team were OK or RECOVERING in each tick
+        attacked_teams: dict[
+            tuple[RoundId, ServiceName, FlagStoreId, TeamName], set[TeamName]
+        ] = {}
+        successful_attackers: dict[
+            tuple[RoundId, ServiceName, FlagStoreId], set[TeamName]
+        ] = {}
+        # Dicts rather than sets keep the order of the attackers deterministic
+        exploited_by: dict[
+            tuple[RoundId, ServiceName, FlagStoreId, TeamName], dict[TeamName, None]
+        ] = {}
         active_teams: typing.MutableMapping[RoundId, set[TeamName]] = (
             collections.defaultdict(set)
         )
+        services_up: list[dict[TeamName, set[ServiceName]]] = []
+        offline = {ServiceState.OFFLINE}
         for round_id, round_data in ctf.enumerate():
+            round_services_up = {}
             for team, team_data in round_data.items():
-                if team != self.nop_team and any(
-                    s != ServiceState.OFFLINE for s in team_data.service_states.values()
-                ):
-                    active_teams[round_id].add(team)
+                # The NOP team neither attacks nor counts as an active team
+                if team != nop_team:
+                    for flag_id in team_data.flags_captured:
+                        flag = flags[flag_id]
+                        if flag.owner == team or flag.owner == nop_team:
+                            continue
+                        key = (flag.round_id, flag.service, flag.flagstore, team)
+                        victims = attacked_teams.get(key)
+                        if victims is None:
+                            victims = attacked_teams[key] = set()
+                            successful_attackers.setdefault(key[:3], set()).add(team)
+                        victims.add(flag.owner)
+                        exploiters = exploited_by.setdefault(
+                            (flag.round_id, flag.service, flag.flagstore, flag.owner),
+                            {},
+                        )
+                        exploiters[team] = None
+
+                    # Teams are active unless all of their services are OFFLINE
+                    if not offline.issuperset(team_data.service_states.values()):
+                        active_teams[round_id].add(team)
+                round_services_up[team] = {
+                    service
+                    for service, state in team_data.service_states.items()
+                    if state in (ServiceState.OK, ServiceState.RECOVERING)
+                }
+            services_up.append(round_services_up)
+        no_victims: frozenset[TeamName] = frozenset()
+        # Number of potential victims of each attacker in each round
+        max_victims_by_round = [
+            max(len(active_teams[RoundId(round_id)]) - 1, 1)
+            for round_id in range(len(rounds))
+        ]
 
         # Do the scoreboard calculations
-        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+        # Accumulate plain floats, and only build the Score objects at the end
+        attack: dict[TeamName, float] = {}
+        defense: dict[TeamName, float] = {}
+        sla: dict[TeamName, float] = {}
         for round_id, round_data in ctf.enumerate():
-            # SLA flags:
-            #   You gain a fixed SLA score for each flag available from the
-            #   validity period, as long as the status is OK or RECOVERING.
             for team, team_data in round_data.items():
-                sla = 0.0
+                # SLA flags:
+                #   You gain a fixed SLA score for each flag available from the
+                #   validity period, as long as the status is OK or RECOVERING.
+                team_sla = sla.get(team, 0.0)
                 for service, state in team_data.service_states.items():
                     flagstores = len(ctf.services[service].flagstores)
-                    max_flags = ctf.config.flag_validity * flagstores
-                    present = 0
+                    max_flags = flag_validity * flagstores
                     if state == ServiceState.OK:
                         present = max_flags
                     elif state == ServiceState.RECOVERING:
-                        for flagstore in ctf.services[service].flagstores:
-                            min_round = max(round_id - ctf.config.flag_validity + 1, 0)
-                            for placement_round_ in range(min_round, round_id + 1):
-                                placement_round = RoundId(placement_round_)
-                                team_data = ctf.rounds[placement_round][team]
-                                flags_stored = team_data.flags_stored.get(service, {})
-
+                        present = 0
+                        round_flags_ok = flags_ok[round_id]
+                        min_round = max(round_id - flag_validity + 1, 0)
+                        for placement_round in range(min_round, round_id + 1):
+                            flags_stored = (
+                                rounds[placement_round][team]
+                                .flags_stored.get(service, {})
+                            )
+                            for flagstore in ctf.services[service].flagstores:
                                 # Was previous round flag stored?
                                 flag_id = flags_stored.get(flagstore)
                                 if flag_id is None:
                                     continue
 
                                 # Was previous round flag retrievable?
-                                flag_states = ctf.flag_states[round_id]
-                                if flag_states.get(flag_id) == FlagState.OK:
+                                if flag_id in round_flags_ok:
                                     present += 1
-                    sla += self.base * present / max_flags * flagstores
-                scoreboard[team] += Score.default(sla=sla)
-
-            # Attack flags:
-            #   For each flag that is still valid, if you capture that flag
-            #   you get points scaled by how many teams captured that flag.
-            for team, team_data in round_data.items():
-                attack = 0.0
-                for flag_id in team_data.flags_captured:
-                    flag = ctf.flags[flag_id]
-                    if flag.owner == team or self.nop_team in (flag.owner, team):
-                        continue
-                    attack += self._jeopardy(ctf.flag_captures[flag_id].count, ctf)
-                scoreboard[team] += Score.default(attack=attack)
+                    else:
+                        continue  # No SLA points
+                    team_sla += self.base * present / max_flags * flagstores
+                sla[team] = team_sla
+
+                # Attack flags:
+                #   For each flag that is still valid, if you capture that flag
+                #   you get points scaled by how many teams captured that flag.
+                team_attack = attack.get(team, 0.0)
+                if team != nop_team:
+                    for flag_id in team_data.flags_captured:
+                        owner = flags[flag_id].owner
+                        if owner != team and owner != nop_team:
+                            team_attack += attack_points[flag_id]
+                attack[team] = team_attack
 
             # Defense flags:
             #   For each flag that is still valid, for each attacking team,
             #   if you did not get exploited by that team,
             #   you get points scaled by the number of teams that that team did not exploit.
             for service, flagstore in ctf.flagstores:
-                # Attackers for flags deployed this round in service, flagstore.
-                victims_by_attacker = attacked_teams[(round_id, service, flagstore)]
                 match self.attackers:
                     case AttackerMode.Everyone:
                         attackers = ctf.teams
                     case AttackerMode.Successful | AttackerMode.Scaled:
-                        attackers = [
-                            team
-                            for team in ctf.teams
-                            if len(victims_by_attacker.get(team, set())) > 0
-                        ]
+                        successful = successful_attackers.get(
+                            (round_id, service, flagstore)
+                        )
+                        if successful is None:
+                            continue  # Nobody to defend against
+                        attackers = [team for team in ctf.teams if team in successful]
+                # Attackers for flags deployed this round in service, flagstore.
+                victims_by_attacker = {
+                    attacker: attacked_teams.get(
+                        (round_id, service, flagstore, attacker), no_victims
+                    )
+                    for attacker in attackers
+                }
+
+                # What defending against an attacker is worth in each check round does not depend on the defending
+                # team, so compute it once per attacker rather than once per (team, attacker) pair.
+                check_rounds = range(
+                    round_id, min(len(rounds), round_id + flag_validity)
+                )
+                scaled = self.attackers == AttackerMode.Scaled
+                attacker_count = len(attackers)
+                values_by_attacker: dict[TeamName, list[float]] = {}
+                max_defense_by_attacker: dict[TeamName, float] = {}
+                for attacker in attackers:
+                    exploited = len(victims_by_attacker[attacker])
+                    values = []
+                    for check_round_id in check_rounds:
+                        # Calculate the flag value if retrievable.
+                        max_victims = max_victims_by_round[check_round_id]
+                        value = jeopardy(max_victims - exploited)
+                        if scaled:
+                            value *= max_victims / attacker_count
+                        values.append(value / flag_validity)
+                    values_by_attacker[attacker] = values
+                    max_defense = 0
+                    for value in values:
+                        max_defense += value
+                    max_defense_by_attacker[attacker] = max_defense
+                # Value of defending against all attackers in each check round. Each team then only needs to subtract
+                # the values of the attackers that exploited it, rather than checking every attacker.
+                total_values = [
+                    sum(values) for values in zip(*values_by_attacker.values())
+                ]
 
                 for team in ctf.teams:
-                    if team == self.nop_team:
+                    if team == nop_team:
                         continue
 
-                    team_data = round_data[team]
-                    for attacker in attackers:
-                        if team in victims_by_attacker[attacker]:
-                            continue
-
-                        # Ensure it was stored to have been defended.
-                        flags_stored = team_data.flags_stored.get(service, {})
-                        flag_id = flags_stored.get(flagstore)
-                        if flag_id is None:
-                            continue
-
-                        defense = 0
-                        max_defense = 0
-
-                        max_check_round = round_id + ctf.config.flag_validity
-                        max_check_round = min(len(ctf.rounds), max_check_round)
-                        for check_round_id_ in range(round_id, max_check_round):
-                            check_round_id = RoundId(check_round_id_)
+                    # Ensure it was stored to have been defended.
+                    flags_stored = round_data[team].flags_stored.get(service, {})
+                    flag_id = flags_stored.get(flagstore)
+                    if flag_id is None:
+                        continue
 
-                            # Calculate the flag value if retrievable.
-                            max_victims = max(len(active_teams[check_round_id]) - 1, 1)
-                            not_exploited = max_victims - len(
-                                victims_by_attacker[attacker]
-                            )
-                            value = self._jeopardy(not_exploited, ctf)
-                            if self.attackers == AttackerMode.Scaled:
-                                value *= max_victims / len(attackers)
-                            value = value / ctf.config.flag_validity
-
-                            # Ensure the service was OK or RECOVERING.
-                            check_round = ctf.rounds[check_round_id][team]
-                            service_state = check_round.service_states[service]
-                            if service_state in (
-                                ServiceState.OK,
-                                ServiceState.RECOVERING,
-                            ):
-                                # And that the flag was available.
-                                flag_states = ctf.flag_states[check_round_id]
-                                if flag_states.get(flag_id) == FlagState.OK:
-                                    defense += value
-                            max_defense += value
-
-                        if self.defense_compensation and attacker == team:
-                            scoreboard[team] += Score.default(attack=max_defense)
-                        elif attacker != team:
-                            scoreboard[team] += Score.default(defense=defense)
+                    # Teams never defend against themselves, but may be compensated
+                    own_values = values_by_attacker.get(team)
+                    if own_values is not None and self.defense_compensation:
+                        attack[team] = (
+                            attack.get(team, 0.0) + max_defense_by_attacker[team]
+                        )
+
+                    exploiters = exploited_by.get(
+                        (round_id, service, flagstore, team), {}
+                    )
+                    skipped = [values_by_attacker[attacker] for attacker in exploiters]
+                    if own_values is not None:
+                        skipped.append(own_values)
+                    if len(skipped) == attacker_count:
+                        continue  # Nobody left to defend against
+
+                    team_defense = 0.0
+                    for index, check_round_id in enumerate(check_rounds):
+                        # Ensure the service was OK or RECOVERING,
+                        # and that the flag was available.
+                        if (
+                            service in services_up[check_round_id][team]
+                            and flag_id in flags_ok[check_round_id]
+                        ):
+                            value = total_values[index]
+                            for values in skipped:
+                                value -= values[index]
+                            team_defense += value
+                    defense[team] = defense.get(team, 0.0) + team_defense
 
+        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+        for team in sla:
+            scoreboard[team] = Score.default(
+                attack=attack[team], defense=defense.get(team, 0.0), sla=sla[team]
+            )
         return scoreboard
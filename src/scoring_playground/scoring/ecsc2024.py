@@ -1,6 +1,6 @@
 import dataclasses
-import copy
 import collections
+import functools
 import math
 
 from ..model import (
@@ -38,6 +38,11 @@ class ECSC2024(ScoringFormula):
                 return self.base
             return self.score() * self.up_rounds / self.rounds
 
+        def copy(self) -> "ECSC2024.ServiceScore":
+            return ECSC2024.ServiceScore(
+                self.base, self.attack, self.defense, self.rounds, self.up_rounds
+            )
+
     base: float = 5000.0
     scale: float = 15 * math.sqrt(5)
     norm: float = math.log(math.log(5)) / 12
@@ -62,6 +67,13 @@ class ECSC2024(ScoringFormula):
             for service in ctf.services:
                 _ = scores[RoundId(-1)][team][service]
 
+        @functools.cache
+        def root_score(
+            round_id: RoundId, team: TeamName, service: ServiceName
+        ) -> float:
+            # Only used for rounds that are complete, so their scores do not change anymore
+            return math.sqrt(scores[round_id][team][service].score())
+
         flags_lost =collections.defaultdict(
                 lambda: collections.defaultdict(
                     lambda: set()
@@ -69,7 +81,11 @@ class ECSC2024(ScoringFormula):
             )
         for round_id, round_data in ctf.enumerate():
             prev_scores = scores[RoundId(round_id - 1)]
-            new_scores = scores[round_id] = copy.deepcopy(prev_scores)
+            new_scores = scores[round_id]
+            for team, prev_team_scores in prev_scores.items():
+                new_team_scores = new_scores[team]
+                for service, service_score in prev_team_scores.items():
+                    new_team_scores[service] = service_score.copy()
 
             # Check for system errors
             skip_sla: dict[ServiceName, bool] = collections.defaultdict(lambda: True)
@@ -104,22 +120,23 @@ class ECSC2024(ScoringFormula):
                     # Quirk: scores taken at *end* of flag deployment round
                     assert round_id != flag.round_id
                     if flag.round_id == 0:
-                        related_scores = scores[RoundId(-1)]
+                        related_round = RoundId(-1)
                     else:
-                        related_scores = scores[RoundId(flag.round_id)]
+                        related_round = RoundId(flag.round_id)
                     assert flag.round_id != round_id
                     flags_lost[flag.owner][flag.service].add(team)
-                    attacker_score = related_scores[team][flag.service].score()
-                    victim_score = related_scores[flag.owner][flag.service].score()
-                    score_delta = math.sqrt(attacker_score) - math.sqrt(victim_score)
+                    score_delta = root_score(
+                        related_round, team, flag.service
+                    ) - root_score(related_round, flag.owner, flag.service)
                     delta = self.scale / (1 + math.exp(score_delta * self.norm))
                     new_scores[team][flag.service].attack += delta
                     new_scores[flag.owner][flag.service].defense += delta
 
             for team in round_data:
-                for service, service_score in new_scores[team].items():
-                    if service_score.sum() < 0:
-                        service_score.defense += service_score.sum()
+                for service_score in new_scores[team].values():
+                    score_sum = service_score.sum()
+                    if score_sum < 0:
+                        service_score.defense += score_sum
 
         scoreboard: Scoreboard = collections.defaultdict(Score.default)
         last_round = RoundId(len(ctf.rounds) - 1)
@@ -1,11 +1,13 @@
 import dataclasses
 import collections
+import functools
 import typing
 
 from msgspec import UNSET
 
 from ..model import (
     CTF,
+    FlagId,
     FlagState,
     FlagStoreId,
     RoundId,
@@ -60,78 +62,136 @@ class ECSC2025(ScoringFormula):
         if ctf.flag_states is UNSET:
             raise KeyError(f"No flag state information defined in CTF data")
 
-        # Pre-compute victims for each service/flagstore/attacker,
-        # attributed back to the round in which the stolen flag was deployed
-        attacked_teams: typing.MutableMapping[
-            tuple[RoundId, ServiceName, FlagStoreId],
-            typing.MutableMapping[TeamName, set[TeamName]],
-        ] = collections.defaultdict(lambda: collections.defaultdict(set))
-        for round_id, round_data in ctf.enumerate():
-            for team, team_data in round_data.items():
-                for flag_id in team_data.flags_captured:
-                    flag = ctf.flags[flag_id]
-                    if flag.owner == team or self.nop_team in (flag.owner, team):
-                        continue
-                    attacked_teams[(flag.round_id, flag.service, flag.flagstore)][
-                        team
-                    ].add(ctf.flags[flag_id].owner)
+        flags = ctf.flags
+        flag_captures = ctf.flag_captures
+        rounds = ctf.rounds
+        # Flag states are only ever checked for OK, so reduce them to the OK flag ids of each round
+        flags_ok = [
+            {flag_id for flag_id, state in flag_states.items() if state == FlagState.OK}
+            for flag_states in ctf.flag_states
+        ]
+        flag_validity = ctf.config.flag_validity
+        nop_team = self.nop_team
+        flagstores_by_service = {
+            name: service.flagstores for name, service in ctf.services.items()
+        }
 
-        # Pre-compute active teams for each tick.
+        # Solve counts are small integers, so there are only a few distinct jeopardy values to compute
+        jeopardy = functools.cache(self._jeopardy)
+
+        # Pre-compute (in one pass over the CTF):
+        #  - the number of victims for each service/flagstore/attacker,
+        #    attributed back to the round in which the stolen flag was deployed
+        #  - the attackers for each service/flagstore (and victim) in that round
+        #  - the captures that are worth attack points
+        #    (i.e. not involving the NOP team or the attacker itself)
+        #  - active teams for each tick
+        #  - which services of each team were OK or RECOVERING in each tick
+        victim_counts: dict[
+            tuple[RoundId, ServiceName, FlagStoreId, TeamName], int
+        ] = {}
+        successful_attackers: dict[
+            tuple[RoundId, ServiceName, FlagStoreId], set[TeamName]
+        ] = {}
+        exploited_by: dict[
+            tuple[RoundId, ServiceName, FlagStoreId, TeamName], dict[TeamName, None]
+        ] = {}
+        valid_captures: dict[tuple[RoundId, TeamName], list[FlagId]] = {}
         active_teams: typing.MutableMapping[RoundId, set[TeamName]] = (
             collections.defaultdict(set)
         )
+        services_up: list[dict[TeamName, set[ServiceName]]] = []
+        offline = {ServiceState.OFFLINE}
         for round_id, round_data in ctf.enumerate():
+            round_services_up = {}
             for team, team_data in round_data.items():
-                if team != self.nop_team and any(
-                    s != ServiceState.OFFLINE for s in team_data.service_states.values()
-                ):
-                    active_teams[round_id].add(team)
+                # The NOP team neither attacks nor counts as an active team
+                if team != nop_team:
+                    captures = None
+                    for flag_id in team_data.flags_captured:
+                        flag = flags[flag_id]
+                        if flag.owner == team or flag.owner == nop_team:
+                            continue
+                        if captures is None:
+                            captures = valid_captures[(round_id, team)] = []
+                        captures.append(flag_id)
 
-        # Do the scoreboard calculations
-        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+                        # A dict keeps the attackers in a deterministic order
+                        exploiters = exploited_by.setdefault(
+                            (flag.round_id, flag.service, flag.flagstore, flag.owner),
+                            {},
+                        )
+                        if team in exploiters:
+                            continue  # Only count each victim once
+                        exploiters[team] = None
+
+                        key = (flag.round_id, flag.service, flag.flagstore, team)
+                        victim_count = victim_counts.get(key)
+                        if victim_count is None:
+                            victim_count = 0
+                            successful_attackers.setdefault(key[:3], set()).add(team)
+                        victim_counts[key] = victim_count + 1
+
+                    # Teams are active unless all of their services are OFFLINE
+                    if not offline.issuperset(team_data.service_states.values()):
+                        active_teams[round_id].add(team)
+                round_services_up[team] = {
+                    service
+                    for service, state in team_data.service_states.items()
+                    if state in (ServiceState.OK, ServiceState.RECOVERING)
+                }
+            services_up.append(round_services_up)
+        # Number of potential victims of each attacker in each tick
+        max_victims_by_round = [
+            max(len(active_teams[RoundId(round_id)]) - 1, 1)
+            for round_id in range(len(rounds))
+        ]
+
+        # Do the scoreboard calculations, summing up plain floats per team
+        attack: dict[TeamName, float] = {}
+        defense: dict[TeamName, float] = {}
+        sla: dict[TeamName, float] = {}
         for round_id, round_data in ctf.enumerate():
             # SLA flags:
             #   You gain a fixed SLA score for each flag available from the
             #   validity period, as long as the status is OK or RECOVERING.
             for team, team_data in round_data.items():
-                sla = 0.0
+                team_sla = sla.get(team, 0.0)
                 for service, state in team_data.service_states.items():
-                    flagstores = len(ctf.services[service].flagstores)
-                    max_flags = ctf.config.flag_validity * flagstores
-                    present = 0
+                    flagstores = len(flagstores_by_service[service])
+                    max_flags = flag_validity * flagstores
                     if state == ServiceState.OK:
                         present = max_flags
                     elif state == ServiceState.RECOVERING:
-                        for flagstore in ctf.services[service].flagstores:
-                            min_round = max(round_id - ctf.config.flag_validity + 1, 0)
-                            for placement_round_ in range(min_round, round_id + 1):
-                                placement_round = RoundId(placement_round_)
-                                team_data = ctf.rounds[placement_round][team]
-                                flags_stored = team_data.flags_stored.get(service, {})
-
+                        present = 0
+                        min_round = max(round_id - flag_validity + 1, 0)
+                        round_flags_ok = flags_ok[round_id]
+                        # Each placement round in the window is only looked up once for all flagstores
+                        for placement_round in range(min_round, round_id + 1):
+                            placement_data = rounds[placement_round][team]
+                            flags_stored = placement_data.flags_stored.get(service, {})
+                            for flagstore in flagstores_by_service[service]:
                                 # Was previous round flag stored?
                                 flag_id = flags_stored.get(flagstore)
                                 if flag_id is None:
                                     continue
 
                                 # Was previous round flag retrievable?
-                                flag_states = ctf.flag_states[round_id]
-                                if flag_states.get(flag_id) == FlagState.OK:
+                                if flag_id in round_flags_ok:
                                     present += 1
-                    sla += self.base * present / max_flags * flagstores
-                scoreboard[team] += Score.default(sla=sla)
+                    else:
+                        continue  # No SLA points
+                    team_sla += self.base * present / max_flags * flagstores
+                sla[team] = team_sla
 
             # Attack flags:
             #   For each flag that is still valid, if you capture that flag
             #   you get points scaled by how many teams captured that flag.
-            for team, team_data in round_data.items():
-                attack = 0.0
-                for flag_id in team_data.flags_captured:
-                    flag = ctf.flags[flag_id]
-                    if flag.owner == team or self.nop_team in (flag.owner, team):
-                        continue
-                    attack += self._jeopardy(ctf.flag_captures[flag_id].count)
-                scoreboard[team] += Score.default(attack=attack)
+            for team in round_data:
+                team_attack = attack.get(team, 0.0)
+                for flag_id in valid_captures.get((round_id, team), ()):
+                    team_attack += jeopardy(flag_captures[flag_id].count)
+                attack[team] = team_attack
 
             # Defense flags:
             #   For each flag that is still valid, for each attacking team,
@@ -139,58 +199,84 @@ class ECSC2025(ScoringFormula):
             #   you get points scaled by the number of teams that that team did not exploit.
             for service, flagstore in ctf.flagstores:
                 # Attackers for flags deployed this round in service, flagstore.
-                victims_by_attacker = attacked_teams[(round_id, service, flagstore)]
-                attackers = [
-                    team
-                    for team in ctf.teams
-                    if len(victims_by_attacker.get(team, set())) > 0
+                successful = successful_attackers.get((round_id, service, flagstore))
+                if successful is None:
+                    continue  # Nothing to defend against
+                attackers = [team for team in ctf.teams if team in successful]
+                victim_count_by_attacker = {
+                    attacker: victim_counts[(round_id, service, flagstore, attacker)]
+                    for attacker in attackers
+                }
+
+                # Flag values only depend on the attacker and the check round, not on the defending team
+                max_check_round = round_id + flag_validity
+                max_check_round = min(len(rounds), max_check_round)
+                check_rounds = range(round_id, max_check_round)
+                values_by_attacker: dict[TeamName, list[float]] = {}
+                for attacker in attackers:
+                    values = []
+                    for check_round_id in check_rounds:
+                        # Calculate the flag value if retrievable.
+                        max_victims = max_victims_by_round[check_round_id]
+                        not_exploited = max_victims - victim_count_by_attacker[attacker]
+                        value = jeopardy(not_exploited)
+                        value *= max_victims / len(attackers)
+                        values.append(value / flag_validity)
+                    values_by_attacker[attacker] = values
+                # Defending against all attackers, teams subtract the attackers that exploited them
+                total_values = [
+                    sum(values) for values in zip(*values_by_attacker.values())
                 ]
 
                 for team in ctf.teams:
-                    if team == self.nop_team:
+                    if team == nop_team:
                         continue
 
-                    team_data = round_data[team]
-                    for attacker in attackers:
-                        if team in victims_by_attacker[attacker]:
-                            continue
+                    # Ensure it was stored to have been defended.
+                    flags_stored = round_data[team].flags_stored.get(service, {})
+                    flag_id = flags_stored.get(flagstore)
+                    if flag_id is None:
+                        continue
 
-                        # Ensure it was stored to have been defended.
-                        flags_stored = team_data.flags_stored.get(service, {})
-                        flag_id = flags_stored.get(flagstore)
-                        if flag_id is None:
-                            continue
+                    exploiters = exploited_by.get(
+                        (round_id, service, flagstore, team), {}
+                    )
+                    if len(exploiters) == len(attackers):
+                        continue  # Exploited by everyone
 
-                        defense = 0
-                        max_check_round = round_id + ctf.config.flag_validity
-                        max_check_round = min(len(ctf.rounds), max_check_round)
-                        for check_round_id_ in range(round_id, max_check_round):
-                            check_round_id = RoundId(check_round_id_)
-
-                            # Calculate the flag value if retrievable.
-                            max_victims = max(len(active_teams[check_round_id]) - 1, 1)
-                            not_exploited = max_victims - len(
-                                victims_by_attacker[attacker]
-                            )
-                            value = self._jeopardy(not_exploited)
-                            value *= max_victims / len(attackers)
-                            value = value / ctf.config.flag_validity
-
-                            # Ensure the service was OK or RECOVERING.
-                            check_round = ctf.rounds[check_round_id][team]
-                            service_state = check_round.service_states[service]
-                            if service_state in (
-                                ServiceState.OK,
-                                ServiceState.RECOVERING,
-                            ):
-                                # And that the flag was available.
-                                flag_states = ctf.flag_states[check_round_id]
-                                if flag_states.get(flag_id) == FlagState.OK:
-                                    defense += value
-
-                        if attacker == team:
-                            scoreboard[team] += Score.default(attack=defense)
-                        elif attacker != team:
-                            scoreboard[team] += Score.default(defense=defense)
+                    defended = [
+                        # Ensure the service was OK or RECOVERING,
+                        service in services_up[check_round_id][team]
+                        # and that the flag was available.
+                        and flag_id in flags_ok[check_round_id]
+                        for check_round_id in check_rounds
+                    ]
 
+                    skipped = [values_by_attacker[attacker] for attacker in exploiters]
+                    own_values = values_by_attacker.get(team)
+                    if own_values is not None:
+                        # Defending against yourself counts as attack
+                        team_attack = 0
+                        for value, was_defended in zip(own_values, defended):
+                            if was_defended:
+                                team_attack += value
+                        attack[team] = attack.get(team, 0.0) + team_attack
+                        skipped.append(own_values)
+                    if len(skipped) == len(attackers):
+                        continue
+
+                    team_defense = 0.0
+                    for index, was_defended in enumerate(defended):
+                        if was_defended:
+                            value = total_values[index]
+                            for values in skipped:
+                                value -= values[index]
+                            team_defense += value
+                    defense[team] = defense.get(team, 0.0) + team_defense
+
+        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+        for team in sla:
+            scoreboard[team] = Score.default(
+                attack=attack[team], defense=defense.get(team, 0.0), sla=sla[team]
+            )
         return scoreboard
@@ -2,6 +2,8 @@ import dataclasses
 import collections
 import typing
 
+from msgspec import UNSET
+
 from ..model import (
     CTF,
     FlagId,
@@ -32,9 +34,9 @@ class SaarCTF2024(ScoringFormula):
 
     @staticmethod
     def _rank(
-        scoreboard: Scoreboard, teams: typing.Sequence[TeamName]
+        scores: typing.Mapping[TeamName, float], teams: typing.Sequence[TeamName]
     ) -> typing.Mapping[TeamName, int]:
-        ordered = sorted(((scoreboard[team].combined, team) for team in teams), reverse=True)
+        ordered = sorted(((scores[team], team) for team in teams), reverse=True)
         previous = None
         ranking = {}
         counter = 1
@@ -56,98 +58,127 @@ class SaarCTF2024(ScoringFormula):
                 f"Configured NOP team {str(self.nop_team)!r} not found in the CTF data"
             )
 
-        scoreboard: Scoreboard = collections.defaultdict(Score.default)
-        for team in ctf.teams:
-            _ = scoreboard[team]
-
-        rankings: dict[RoundId, typing.Mapping[TeamName, int]] = {}
+        teams = ctf.teams
+        # Running totals per team, only turned into Score objects at the very end. The combined
+        # total is kept separately and updated in the same order as adding up the individual
+        # Score objects would, since the rankings compare it exactly (and float addition is
+        # not associative).
+        combined_scores = dict.fromkeys(teams, 0.0)
+        attack_scores = dict.fromkeys(teams, 0.0)
+        defense_scores = dict.fromkeys(teams, 0.0)
+        sla_scores = dict.fromkeys(teams, 0.0)
+
+        # The rank-dependent part of the flag values, i.e., sqrt(1 / rank) per team and round
+        rank_values: dict[RoundId, typing.Mapping[TeamName, float]] = {}
+        # In the first round, instead of everyone being rank 1, everyone is
+        # at a very low rank (i.e., first-round flags are worth a bit less).
+        first_round_rank_value = (1 / len(teams)) ** 0.5
+        flag_rates: dict[ServiceName, float] = {}
+        for name, service in ctf.services.items():
+            if service.flag_rate is UNSET:
+                raise KeyError(f"No flag rate defined for service {name!r} in CTF data")
+            flag_rates[name] = service.flag_rate
+        flags = ctf.flags
+        flag_captures = ctf.flag_captures
         previous_slas: dict[
             RoundId, typing.Mapping[tuple[TeamName, ServiceName], float]
         ] = {}
         num_active_teams: dict[RoundId, int] = {}
         for round_id, round_data in ctf.enumerate():
-            # Compute scoreboard rankings before this round
-            rankings[round_id] = SaarCTF2024._rank(scoreboard, ctf.teams)
+            previous_round_id = RoundId(round_id - 1)
 
-            # Compute SLA scores and count teams
-            sla: typing.MutableMapping[tuple[TeamName, ServiceName], float] = (
-                collections.defaultdict(float)
-            )
+            # Compute scoreboard rankings before this round
+            rank_values[round_id] = {
+                team: (1 / rank) ** 0.5
+                for team, rank in SaarCTF2024._rank(combined_scores, teams).items()
+            }
+
+            # Compute SLA scores and count teams. Only services that are OK get an entry,
+            # everything else is worth 0.0 (see the lookup in the defense pass).
+            sla: dict[tuple[TeamName, ServiceName], float] = {}
             active_teams: set[TeamName] = set()
             for team, team_data in round_data.items():
                 for service, state in team_data.service_states.items():
-                    if state == ServiceState.OK or state == ServiceState.RECOVERING:
-                        active_teams.add(team)
                     if state == ServiceState.OK:
-                        sla[(team, service)] += self.sla_factor
+                        active_teams.add(team)
+                        sla[(team, service)] = self.sla_factor
+                    elif state == ServiceState.RECOVERING:
+                        active_teams.add(team)
             num_active_teams[round_id] = max(1, len(active_teams))
-            for team in round_data.keys():
-                for service in ctf.services:
-                    sla[(team, service)] *= num_active_teams[round_id] ** 0.5
-                scoreboard[team] += Score.default(
-                    sla=sum(sla[(team, service)] for service in ctf.services)
-                )
+            sla_scale = num_active_teams[round_id] ** 0.5
+            round_sla = dict.fromkeys(round_data, 0.0)
+            for key in sla:
+                sla[key] *= sla_scale
+                round_sla[key[0]] += sla[key]
+            for team, points in round_sla.items():
+                combined_scores[team] += points
+                sla_scores[team] += points
             previous_slas[round_id] = sla
 
-            # Compute attack scores
+            # Compute attack scores, remembering the capture counts for the defense pass.
+            # The captured flags are a set, and the defense pass iterates over that set (not
+            # the counts) so that each owner gets their damage added up in the same order as
+            # in the original implementation.
             captured_flags: set[FlagId] = set()
+            capture_counts: dict[FlagId, tuple[int, int]] = {}
             for team, team_data in round_data.items():
                 for flag_id in team_data.flags_captured:
-                    flag = ctf.flags[flag_id]
-                    if flag.owner == self.nop_team:
+                    flag = flags[flag_id]
+                    owner = flag.owner
+                    if owner == self.nop_team:
                         # These are not even submitted in saarCTF data.
                         continue
-                    if team == flag.owner:
+                    if team == owner:
                         continue
 
                     if flag.round_id > 0:
-                        victim_rank = rankings[flag.round_id][flag.owner]
+                        victim_rank_value = rank_values[flag.round_id][owner]
                     else:
-                        # In the first round, instead of everyone being rank 1, everyone is
-                        # at a very low rank (i.e., first-round flags are worth a bit less).
-                        victim_rank = len(ctf.teams)
-
-                    previous_captures = ctf.flag_captures[flag_id].count_before_round(
-                        round_id
-                    )
-                    current_captures = (
-                        ctf.flag_captures[flag_id].count_in_round(round_id)
-                        + previous_captures
-                    )
+                        victim_rank_value = first_round_rank_value
+
+                    counts = capture_counts.get(flag_id)
+                    if counts is None:
+                        # First capture of this flag in this round
+                        captures = flag_captures[flag_id]
+                        previous_captures = captures.count_before_round(round_id)
+                        current_captures = captures.count_including_round(round_id)
+                        capture_counts[flag_id] = (previous_captures, current_captures)
+                        captured_flags.add(flag_id)
+                        previous_captors = captures.by.get(previous_round_id)
+                    else:
+                        previous_captures, current_captures = counts
+                        previous_captors = None
 
                     current_flag_value = (
-                        1 + (1 / current_captures) ** 0.5 + (1 / victim_rank) ** 0.5
+                        1 + (1 / current_captures) ** 0.5 + victim_rank_value
                     )
+                    flag_rate = flag_rates[flag.service]
 
-                    def delta(previous_flag_value):
-                        return (
+                    if previous_captors:
+                        # The previous round's captors get the change in flag value
+                        previous_flag_value = (
+                            1 + (1 / previous_captures) ** 0.5 + victim_rank_value
+                        )
+                        attack = (
                             (current_flag_value - previous_flag_value)
-                            / ctf.services[flag.service].flag_rate
+                            / flag_rate
                             * self.off_factor
                         )
+                        for related_team in previous_captors:
+                            combined_scores[related_team] += attack
+                            attack_scores[related_team] += attack
 
-                    if flag_id not in captured_flags:
-                        for related_team in ctf.flag_captures[flag_id].by[RoundId(round_id-1)]:
-                            previous_flag_value = (
-                                1
-                                + (1 / previous_captures) ** 0.5
-                                + (1 / victim_rank) ** 0.5
-                            )
-                            attack = delta(previous_flag_value)
-                            if related_team == "C4T BuT S4D":
-                                print(round_id, related_team, flag.service, flag.owner, previous_captures, attack)
-                            scoreboard[related_team] += Score.default(attack=attack)
-                    captured_flags.add(flag_id)
-
-                    attack = delta(0)
-                    if team == "C4T BuT S4D":
-                        print(round_id, flag.flag_id, attack)
-                    scoreboard[team] += Score.default(attack=attack)
+                    attack = current_flag_value / flag_rate * self.off_factor
+                    combined_scores[team] += attack
+                    attack_scores[team] += attack
 
             # Compute defense scores
             for flag_id in captured_flags:
-                flag = ctf.flags[flag_id]
-                victim_sla = previous_slas[flag.round_id][(flag.owner, flag.service)]
+                flag = flags[flag_id]
+                previous_captures, current_captures = capture_counts[flag_id]
+                victim_sla = previous_slas[flag.round_id].get(
+                    (flag.owner, flag.service), 0.0
+                )
 
                 if self.defense_bug:
                     team_count = num_active_teams[round_id]
@@ -155,23 +186,26 @@ class SaarCTF2024(ScoringFormula):
                     # This is what was probably intended
                     team_count = num_active_teams[flag.round_id]
 
-                previous_captures = ctf.flag_captures[flag_id].count_before_round(
-                    round_id
-                )
-                current_captures = (
-                    ctf.flag_captures[flag_id].count_in_round(round_id)
-                    + previous_captures
-                )
-
                 previous_damage = (previous_captures / team_count) ** 0.3 * victim_sla
                 current_damage = (current_captures / team_count) ** 0.3 * victim_sla
 
                 damage = (
                     (previous_damage - current_damage)
-                    / ctf.services[flag.service].flag_rate
+                    / flag_rates[flag.service]
                     * self.def_factor
                 )
                 assert damage < 0 or (not victim_sla and damage <= 0)
-                scoreboard[flag.owner] += Score.default(defense=damage)
+                combined_scores[flag.owner] += damage
+                defense_scores[flag.owner] += damage
 
+        scoreboard: Scoreboard = collections.defaultdict(Score.default)
+        for team in teams:
+            scoreboard[team] = Score(
+                combined_scores[team],
+                categories={
+                    "ATK": attack_scores[team],
+                    "DEF": defense_scores[team],
+                    "SLA": sla_scores[team],
+                },
+            )
         return scoreboard
@@ -4,67 +4,76 @@ import msgspec
 import typing
 
 
-def defaults[Extends](
-    **exts: typing.Callable[[Extends], typing.Any],
-) -> typing.Callable[[type[Extends]], type[Extends]]:
-    """Assigns defaults to None-valued fields in a dataclass"""
+def force_setattr(obj: object, name: str, value: typing.Any) -> None:
+    """Sets an attribute on a frozen dataclass or msgspec.Struct"""
+    if isinstance(obj, msgspec.Struct):
+        msgspec.structs.force_setattr(obj, name, value)
+    else:
+        object.__setattr__(obj, name, value)
 
-    def defaults_decorator(cls: type[Extends]) -> type[Extends]:
-        if not dataclasses.is_dataclass(cls):
-            raise TypeError(f"Cannot assign defaults in non-dataclass type {cls}")
 
-        field_names = set()
-        for field in dataclasses.fields(cls):
-            field_names.add(field.name)
+def defaults[Extends](
+    **exts: typing.Callable[[Extends], typing.Any],
+) -> typing.Callable[[Extends], None]:
+    """Builds a function that assigns defaults to UNSET-valued fields in a dataclass or msgspec.Struct
 
-        for ext in exts:
-            if ext not in field_names:
-                raise AttributeError(f"{cls} has no attribute {ext}")
+    Call the result from the class's `__post_init__`.
+    """
 
-        post_init = getattr(cls, "__post_init__", None)
-        wrapper = functools.wraps(post_init) if post_init else (lambda fn: fn)
+    ext_items = tuple(exts.items())
 
-        @wrapper
-        def new_post_init(self: Extends) -> None:
-            for key in exts:
-                if getattr(self, key) is msgspec.UNSET:
-                    # Bypass `frozen=true`
-                    object.__setattr__(self, key, exts[key](self))
+    def assign_defaults(obj: Extends) -> None:
+        for key, default in ext_items:
+            if getattr(obj, key) is msgspec.UNSET:
+                # Bypass `frozen=true`
+                force_setattr(obj, key, default(obj))
 
-            if post_init:
-                return post_init(self)
+    return assign_defaults
 
-        setattr(cls, "__post_init__", new_post_init)
-        return cls
 
-    return defaults_decorator
+_MISSING: typing.Any = object()
 
 
 @dataclasses.dataclass
 class ImmutableCache:
+    # Each cached function gets its own attribute: this prefix + the function's __qualname__
     attribute: str = "__immutable_cache__"
 
+    def _name(self, function: typing.Callable) -> str:
+        return self.attribute + function.__qualname__
+
     def __call__[T, U](
         self, function: typing.Callable[[T], U]
     ) -> typing.Callable[[T], U]:
         """Caches the function results under the assumption that `self` never changes"""
 
+        name = self._name(function)
+
         @functools.wraps(function)
         def caching_wrapper(obj: T) -> U:
-            if not hasattr(obj, self.attribute):
-                cache: dict[str, typing.Any] = {}
-                object.__setattr__(obj, self.attribute, cache)
-            else:
-                cache = getattr(obj, self.attribute)
-            if function.__qualname__ not in cache:
-                cache[function.__qualname__] = function(obj)
-            return typing.cast(U, cache[function.__qualname__])
+            result = getattr(obj, name, _MISSING)
+            if result is _MISSING:
+                result = function(obj)
+                force_setattr(obj, name, result)
+            return result
 
         return caching_wrapper
 
+    def peek(self, obj: object, function: typing.Callable) -> typing.Any:
+        """Returns the cached result of `function` for `obj`, or raises KeyError"""
+        result = getattr(obj, self._name(function), _MISSING)
+        if result is _MISSING:
+            raise KeyError(function.__qualname__)
+        return result
+
+    def store(self, obj: object, function: typing.Callable, value: typing.Any) -> None:
+        """Seeds the cache of `obj` with a precomputed result of `function`"""
+        force_setattr(obj, self._name(function), value)
+
     def reset(self, obj: object) -> None:
-        if hasattr(obj, self.attribute):
-            object.__delattr__(obj, self.attribute)
+        namespace = getattr(obj, "__dict__", {})
+        for name in [name for name in namespace if name.startswith(self.attribute)]:
+            del namespace[name]
 
 
 immutable_cache = ImmutableCache()
@@ -0,0 +1,57 @@
+import msgspec
+import random
+import warnings
+from scoring_playground.model import CTF
+
+
+def make_ctf(
+    seed: int,
+    teams: int = 6,
+    services: int = 3,
+    rounds: int = 16,
+    flag_validity: int = 4,
+    capture_probability: float = 0.1,
+    states: tuple[str, ...] = ("OK",) * 6 + ("RECOVERING", "MUMBLE", "OFFLINE", "ERROR"),
+) -> CTF:
+    """A random CTF (without flag states) for comparing scoring results"""
+    rng = random.Random(seed)
+    team_names = ["NOP"] + [f"team{i}" for i in range(1, teams)]
+    service_data = {}
+    for i in range(services):
+        first = 2 * i
+        service_data[f"service{i}"] = {"flagstores": list(range(first, first + rng.randint(1, 2)))}
+    round_data = []
+    stored = []  # (round, owner, flag)
+    for round_id in range(rounds):
+        current = {}
+        for team in team_names:
+            flags_stored = {}
+            for service, data in service_data.items():
+                flags_stored[service] = {}
+                for flagstore in data["flagstores"]:
+                    flags_stored[service][flagstore] = len(stored)
+                    stored.append((round_id, team, len(stored)))
+            current[team] = {
+                "service_states": {
+                    service: "OK" if team == "NOP" else rng.choice(states) for service in service_data
+                },
+                "flags_stored": flags_stored,
+                "flags_captured": [
+                    flag
+                    for placed, owner, flag in stored
+                    if owner != team
+                    and team != "NOP"
+                    and round_id - flag_validity < placed < round_id
+                    and rng.random() < capture_probability
+                ],
+            }
+        round_data.append(current)
+    data = {
+        "services": service_data,
+        "teams": team_names,
+        "rounds": round_data,
+        "config": {"flag_validity": flag_validity},
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Flag states are estimated
+        return msgspec.json.decode(msgspec.json.encode(data), type=CTF)
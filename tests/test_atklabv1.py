@@ -0,0 +1,72 @@
+import msgspec
+import pytest
+import warnings
+import scoring_playground
+from scoring_playground.model import CTF, ServiceState
+
+RETENTION = 3
+R, O, X = "RECOVERING", "OK", "OFFLINE"
+# RECOVERING runs shorter than, as long as and longer than the retention period, at the start and the end
+STATES = {
+    "NOP": [O] * 16,
+    "team1": [O, R, O, R, R, R, X, R, R, R, R, R, O, R, R, O],
+    "team2": [R, R, R, R, O, R, X, R, R, O, R, R, R, R, R, R],
+}
+
+
+def make_ctf() -> CTF:
+    data = {
+        "services": {"service": {"flagstores": [0]}},
+        "teams": list(STATES),
+        "rounds": [
+            {
+                team: {
+                    "service_states": {"service": states[round_id]},
+                    "flags_stored": {"service": {0: round_id * len(STATES) + index}},
+                    "flags_captured": [],
+                }
+                for index, (team, states) in enumerate(STATES.items())
+            }
+            for round_id in range(len(STATES["NOP"]))
+        ],
+        "config": {"flag_validity": RETENTION},
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Flag states are estimated
+        return msgspec.json.decode(msgspec.json.encode(data), type=CTF)
+
+
+def expected_sla(ctf: CTF) -> dict[str, float]:
+    # Walk back over the previous rounds explicitly
+    sla = dict.fromkeys(ctf.teams, 0.0)
+    for round_id, round_data in ctf.enumerate():
+        for team, team_data in round_data.items():
+            for service, state in team_data.service_states.items():
+                max_flags = min(round_id + 1, RETENTION)
+                if state == ServiceState.OK:
+                    present = max_flags
+                elif state == ServiceState.RECOVERING:
+                    present = 1
+                    for previous_round in reversed(range(max(0, round_id - RETENTION), round_id - 1)):
+                        if ctf.rounds[previous_round][team].service_states[service] != ServiceState.RECOVERING:
+                            break
+                        present += 1
+                    present = min(present, max_flags)
+                else:
+                    continue
+                sla[team] += present / max_flags
+    return sla
+
+
+def test_recovering():
+    ctf = make_ctf()
+    formula = scoring_playground.scoring.ATKLABv1()
+    n = len(ctf.rounds)
+    # Slices starting in the middle of a RECOVERING run must not count the rounds before the slice
+    for from_round in (0, 1, 2, 4, 8, 11):
+        for to_round in range(from_round + 1, n + 1):
+            sliced = ctf.slice(from_round, to_round)
+            scoreboard = formula.evaluate(sliced)
+            expected = expected_sla(sliced)
+            for team in ctf.teams:
+                assert scoreboard[team].categories["SLA"] == pytest.approx(expected[team], rel=1e-12, abs=1e-12)
@@ -0,0 +1,86 @@
+import msgspec
+import warnings
+import scoring_playground
+
+# No flag_states, so loading this emits the flag state estimation warning
+raw = msgspec.json.encode(
+    {
+        "services": {"service": {"flagstores": [0, 1]}},
+        "teams": ["NOP", "team1", "team2"],
+        "rounds": [
+            {
+                team: {
+                    "service_states": {"service": "OK" if (r + i) % 3 else "RECOVERING"},
+                    "flags_stored": {"service": {0: 10 * r + 2 * i, 1: 10 * r + 2 * i + 1}},
+                    "flags_captured": [10 * (r - 1) + 2 * ((i + 1) % 3)] if r else [],
+                }
+                for i, team in enumerate(["NOP", "team1", "team2"])
+            }
+            for r in range(4)
+        ],
+        "config": {"flag_validity": 2},
+    }
+)
+
+
+def make_source():
+    # load() is cached per class, so every load needs a fresh class (with the same name, which keys the cache)
+    class Synthetic(scoring_playground.data.builtin.JSONDataSource):
+        @classmethod
+        def read_bytes(cls):
+            return raw
+
+    return Synthetic
+
+
+def load():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        ctf = make_source().load()
+    return ctf, [(warning.category, str(warning.message)) for warning in caught]
+
+
+def test_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCORING_PLAYGROUND_CACHE", "0")
+    uncached, uncached_warnings = load()
+    assert uncached_warnings
+
+    monkeypatch.setenv("SCORING_PLAYGROUND_CACHE", "1")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    cold, cold_warnings = load()
+    entries = list((tmp_path / "scoring_playground").iterdir())
+    assert [entry.suffix for entry in entries] == [".mp"]
+    inode = entries[0].stat().st_ino
+    warm, warm_warnings = load()
+    # A warm load reads the entry instead of replacing it
+    assert list((tmp_path / "scoring_playground").iterdir()) == entries
+    assert entries[0].stat().st_ino == inode
+
+    assert cold == uncached and warm == uncached
+    assert cold.flag_states == warm.flag_states == uncached.flag_states
+    assert cold_warnings == warm_warnings == uncached_warnings
+
+
+def test_cache_warning_category():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        warnings.warn("original", RuntimeWarning)
+        cached = msgspec.msgpack.decode(
+            msgspec.msgpack.encode(scoring_playground.data.builtin.CachedWarning.capture(caught[0])),
+            type=scoring_playground.data.builtin.CachedWarning,
+        )
+        cached.replay()
+    assert [(warning.category, str(warning.message)) for warning in caught] == [(RuntimeWarning, "original")] * 2
+
+
+def test_cache_write_failure(tmp_path, monkeypatch):
+    def fail(source, destination):
+        raise OSError("replace")
+
+    monkeypatch.setenv("SCORING_PLAYGROUND_CACHE", "1")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(scoring_playground.data.builtin.os, "replace", fail)
+    ctf, _ = load()
+    assert ctf.teams == ("NOP", "team1", "team2")
+    # The partially written entry is removed again
+    assert list((tmp_path / "scoring_playground").iterdir()) == []
@@ -0,0 +1,46 @@
+from scoring_playground.model import FlagCaptures, RoundId, TeamName
+
+
+def check(captures: FlagCaptures, rounds: range):
+    # Compare against counting the captures in `by` directly
+    for r in rounds:
+        round_id = RoundId(r)
+        before = sum(len(attackers) for other, attackers in captures.by.items() if other < round_id)
+        during = len(captures.by.get(round_id, []))
+        assert captures.count_before_round(round_id) == before
+        assert captures.count_in_round(round_id) == during
+        assert captures.count_including_round(round_id) == before + during
+    assert captures.count == sum(len(attackers) for attackers in captures.by.values())
+
+
+def test_empty():
+    captures = FlagCaptures()
+    check(captures, range(-1, 3))
+    assert captures.count_before_round(RoundId(0)) == 0
+    assert captures.count_including_round(RoundId(0)) == 0
+
+
+def test_several_per_round():
+    captures = FlagCaptures()
+    for round_id, attacker in [(2, "a"), (2, "b"), (2, "c"), (3, "a"), (5, "b"), (5, "c")]:
+        captures.record(RoundId(round_id), TeamName(attacker))
+    check(captures, range(-1, 8))
+    assert captures.by[RoundId(2)] == ["a", "b", "c"]
+    assert captures.count_before_round(RoundId(2)) == 0
+    assert captures.count_in_round(RoundId(2)) == 3
+    assert captures.count_including_round(RoundId(2)) == 3
+    assert captures.count_before_round(RoundId(4)) == 4
+    assert captures.count_including_round(RoundId(4)) == 4
+
+
+def test_first_and_last_round():
+    # Captures in the first (0) and last (9) round of a 10-round CTF, recorded out of order
+    captures = FlagCaptures()
+    for round_id, attacker in [(9, "a"), (0, "b"), (4, "a"), (0, "c"), (9, "b")]:
+        captures.record(RoundId(round_id), TeamName(attacker))
+    check(captures, range(-1, 11))
+    assert captures.count_before_round(RoundId(0)) == 0
+    assert captures.count_including_round(RoundId(0)) == 2
+    assert captures.count_before_round(RoundId(9)) == 3
+    assert captures.count_including_round(RoundId(9)) == 5
+    assert captures.count_before_round(RoundId(10)) == 5
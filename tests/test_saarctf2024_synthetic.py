@@ -0,0 +1,20 @@
+import json
+import pathlib
+import synthetic
+import scoring_playground
+
+# Scoreboards computed by the original SaarCTF2024 implementation ([combined, ATK, DEF, SLA] per team).
+# The rankings compare combined scores exactly, so the results have to match bit for bit, not just approximately.
+with open(pathlib.Path(__file__).with_name("saarctf2024_synthetic.json")) as file:
+    cases = json.load(file)
+
+
+def test_saarctf2024_synthetic():
+    for case in cases:
+        ctf = synthetic.make_ctf(**case["ctf"])
+        scoreboard = scoring_playground.scoring.SaarCTF2024(**case["formula"]).evaluate(ctf)
+        result = {
+            team: [score.combined, score.categories["ATK"], score.categories["DEF"], score.categories["SLA"]]
+            for team, score in scoreboard.items()
+        }
+        assert result == case["scoreboard"], case["ctf"] | case["formula"]
@@ -0,0 +1,32 @@
+import msgspec
+import synthetic
+from scoring_playground.model import CTF
+
+
+def indexes(ctf: CTF):
+    # Includes the iteration order, which scoring formulas may depend on
+    return (
+        [(flag_id, msgspec.structs.asdict(flag)) for flag_id, flag in ctf.flags.items()],
+        [
+            (flag_id, captures.count, list(captures.by.items()), captures._rounds)
+            for flag_id, captures in ctf.flag_captures.items()
+        ],
+    )
+
+
+def test_slice_indexes():
+    for seed in range(4):
+        ctf = synthetic.make_ctf(seed)
+        fresh = msgspec.json.decode(msgspec.json.encode(ctf), type=CTF)
+        ctf.flags  # Build the indexes that slices may share
+        n = len(ctf.rounds)
+        for from_round in (None, 0, 1, 5, -3):
+            for to_round in (None, 0, 1, 5, n - 1, n + 3):
+                sliced = ctf.slice(from_round, to_round)
+                expected = fresh.slice(from_round, to_round)
+                assert sliced.rounds == expected.rounds
+                assert indexes(sliced) == indexes(expected)
+                # Slices of slices (of a warm CTF)
+                for inner in (1, len(sliced.rounds) // 2):
+                    assert indexes(sliced.slice(0, inner)) == indexes(expected.slice(0, inner))
+                    assert indexes(sliced.slice(inner)) == indexes(expected.slice(inner))